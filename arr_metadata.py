@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+
+from config import (
+    ArrInstance,
+    RADARR_INSTANCES,
+    SONARR_INSTANCES,
+    METADATA_TTL,
+)
+from utils import make_api_request
+
+logger = logging.getLogger(__name__)
+
+
+class MetadataCatalog:
+    """Cached root folders, quality profiles, tags and language profiles of one Radarr/Sonarr instance."""
+
+    def __init__(
+        self,
+        upstream: str,
+        service_name: str,
+        base_url: str | None,
+        api_key: str | None,
+        root_folder_id: int,
+        quality_profile_id: int,
+        endpoints: tuple[str, ...],
+    ):
+        self.upstream = upstream
+        self.service_name = service_name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.root_folder_id = root_folder_id
+        self.quality_profile_id = quality_profile_id
+        self.endpoints = endpoints
+        self._data: dict[str, list] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < METADATA_TTL
+
+    def invalidate(self) -> None:
+        """Marks the catalog stale so the next lookup reloads it from the API."""
+        logger.info(f"{self.service_name} metadata catalog invalidated.")
+        self._loaded_at = None
+
+    async def refresh(self, only_if_stale: bool = False) -> bool:
+        """Reloads every metadata endpoint concurrently. Keeps the previous data for endpoints that fail.
+
+        With only_if_stale, a caller that waited on the lock skips the reload when the refresh it waited for
+        already made the catalog fresh, so concurrent adds against a stale catalog share one reload.
+        """
+        if not self.base_url or not self.api_key:
+            return False
+        async with self._lock:
+            if only_if_stale and self.is_fresh:
+                return True
+            results = await asyncio.gather(*(
+                make_api_request(self.upstream, self.base_url, self.api_key, endpoint)
+                for endpoint in self.endpoints
+            ))
+            loaded = True
+            for endpoint, result in zip(self.endpoints, results):
+                if isinstance(result, list):
+                    self._data[endpoint] = result
+                else:
+                    loaded = False
+            if loaded:
+                self._loaded_at = time.monotonic()
+                logger.info(
+                    f"{self.service_name} metadata loaded: "
+                    + ", ".join(f"{len(self._data[endpoint])} {endpoint}" for endpoint in self.endpoints)
+                )
+            else:
+                logger.warning(f"Could not fully load {self.service_name} metadata. Will retry on next use.")
+            return loaded
+
+    async def _ensure_loaded(self) -> None:
+        if not self.is_fresh:
+            await self.refresh(only_if_stale=True)
+
+    async def get(self, endpoint: str) -> list:
+        """Returns the cached list for a metadata endpoint (e.g. 'tag'), reloading it if stale.
+
+        If the reload fails, the last loaded data is served rather than nothing.
+        """
+        await self._ensure_loaded()
+        if not self.is_fresh and endpoint in self._data:
+            logger.warning(f"Serving stale {self.service_name} {endpoint} metadata.")
+        return self._data.get(endpoint, [])
+
+    async def get_root_folder_path(self) -> str | None:
+        """Resolves the configured root folder ID to its path."""
+        root_folders = await self.get('rootfolder')
+        return next((rf.get('path') for rf in root_folders if rf.get('id') == self.root_folder_id), None)
+
+    def validate(self) -> list[str]:
+        """Returns configuration problems found in the loaded data, e.g. a root folder ID that does not exist."""
+        problems = []
+        if 'rootfolder' in self._data and not any(rf.get('id') == self.root_folder_id for rf in self._data['rootfolder']):
+            available = ', '.join(str(rf.get('id')) for rf in self._data['rootfolder']) or 'none'
+            problems.append(
+                f"{self.service_name} Root Folder ID {self.root_folder_id} does not exist (available: {available})."
+            )
+        if 'qualityprofile' in self._data and not any(
+            qp.get('id') == self.quality_profile_id for qp in self._data['qualityprofile']
+        ):
+            available = ', '.join(str(qp.get('id')) for qp in self._data['qualityprofile']) or 'none'
+            problems.append(
+                f"{self.service_name} Quality Profile ID {self.quality_profile_id} does not exist (available: {available})."
+            )
+        return problems
+
+
+def _catalog(instance: ArrInstance, endpoints: tuple[str, ...]) -> MetadataCatalog:
+    return MetadataCatalog(
+        instance.upstream, instance.name, instance.url, instance.api_key,
+        instance.root_folder_id, instance.quality_profile_id, endpoints,
+    )
+
+
+# One catalog per instance, keyed by its upstream ('radarr', 'radarr_2', ...): each has its own folders and profiles
+INSTANCE_CATALOGS: dict[str, MetadataCatalog] = {
+    **{instance.upstream: _catalog(instance, ('rootfolder', 'qualityprofile', 'tag')) for instance in RADARR_INSTANCES},
+    **{
+        instance.upstream: _catalog(instance, ('rootfolder', 'qualityprofile', 'tag', 'languageprofile'))
+        for instance in SONARR_INSTANCES
+    },
+}
+CATALOGS = tuple(INSTANCE_CATALOGS.values())
+
+
+async def refresh_catalogs() -> None:
+    """Reloads every catalog concurrently."""
+    await asyncio.gather(*(catalog.refresh() for catalog in CATALOGS))
+
+
+async def preload_catalogs() -> list[str]:
+    """Loads every catalog at startup and returns the configuration problems found."""
+    await refresh_catalogs()
+    problems = []
+    for catalog in CATALOGS:
+        problems.extend(catalog.validate())
+    return problems
@@ -0,0 +1,65 @@
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Callable
+
+import json_decode
+from benchmarks.fake_servers import FakeArr
+from models import LOOKUP_FIELDS
+
+SEARCH_RESULT_LIMIT = 10
+
+
+def _fixtures(lookup_results: int, library_size: int) -> dict[str, tuple[bytes, int | None, tuple[str, ...]]]:
+    """Response bodies the fake Radarr serves, with the limit and fields the bot decodes them with."""
+    arr = FakeArr('movie', lookup_results=lookup_results, overview_size=600)
+    lookup = json.dumps([arr._item(100_000 + i, f'benchmark title {i}') for i in range(lookup_results)]).encode()
+    library = json.dumps([arr._item(i, f'Owned {i}') for i in range(1, library_size + 1)]).encode()
+    return {
+        'movie/lookup': (lookup, SEARCH_RESULT_LIMIT, LOOKUP_FIELDS),
+        'movie (library)': (library, None, ('tmdbId',)),
+    }
+
+
+def _measure(func: Callable[[], object], iterations: int) -> tuple[float, int]:
+    """Returns the mean run time in seconds and the peak traced allocation of one run in bytes."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = (time.perf_counter() - started) / iterations
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compares full JSON decoding with limited, projected decoding.")
+    parser.add_argument('--lookup-results', type=int, default=100, help="Items in the lookup response.")
+    parser.add_argument('--library-size', type=int, default=2000, help="Items in the library response.")
+    parser.add_argument('--iterations', type=int, default=50, help="Decodes timed per variant.")
+    args = parser.parse_args()
+
+    orjson = json_decode.orjson
+    variants: list[tuple[str, Callable[[bytes, int | None, tuple[str, ...]], object]]] = [
+        ('json.loads (before)', lambda body, limit, fields: json.loads(body)[:limit]),
+        ('decode_array', lambda body, limit, fields: json_decode.decode_array(body, limit, fields)),
+    ]
+    if orjson is not None:
+        variants.append(('decode_array+orjson', lambda body, limit, fields: json_decode.decode_array(body, limit, fields)))
+
+    print(f"{'response':<16}  {'size KB':>8}  {'variant':<20}  {'ms':>8}  {'peak KB':>9}")
+    for name, (body, limit, fields) in _fixtures(args.lookup_results, args.library_size).items():
+        for label, decode in variants:
+            # Only the +orjson row may use orjson, so the others show what the stdlib alone does
+            json_decode.orjson = orjson if label.endswith('+orjson') else None
+            elapsed, peak = _measure(lambda: decode(body, limit, fields), args.iterations)
+            print(f"{name:<16}  {len(body) / 1024:>8.0f}  {label:<20}  {elapsed * 1000:>8.2f}  {peak / 1024:>9.0f}")
+    json_decode.orjson = orjson
+
+
+if __name__ == '__main__':
+    main()
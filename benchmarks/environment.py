@@ -0,0 +1,41 @@
+import os
+import tempfile
+
+from benchmarks.fake_servers import FakeArr, FakeQBittorrent, FakeServer, FakeSpotify
+
+BOT_TOKEN = '123456:benchmark'
+
+
+def start_fake_upstreams(
+    latency: float = 0.0, lookup_results: int = 100, torrents: int = 2000, library_size: int = 500
+) -> dict[str, FakeServer]:
+    """Starts one fake server per upstream the bot talks to."""
+    return {
+        'radarr': FakeArr('movie', latency, lookup_results, library_size).start(),
+        'sonarr': FakeArr('series', latency, lookup_results, library_size).start(),
+        'qbittorrent': FakeQBittorrent(latency, torrents).start(),
+        'spotify': FakeSpotify(latency).start(),
+    }
+
+
+def point_bot_at(servers: dict[str, FakeServer], **overrides: str) -> None:
+    """Configures the bot through its environment variables. Must run before any bot module is imported."""
+    os.environ.update({
+        'TELEGRAM_BOT_TOKEN': BOT_TOKEN,
+        'RADARR_URL': servers['radarr'].url,
+        'RADARR_API_KEY': 'benchmark',
+        'SONARR_URL': servers['sonarr'].url,
+        'SONARR_API_KEY': 'benchmark',
+        'QBITTORRENT_URL': servers['qbittorrent'].url,
+        'QBITTORRENT_USERNAME': 'admin',
+        'QBITTORRENT_PASSWORD': 'benchmark',
+        'SPOTIFY_API_URL': servers['spotify'].url,
+        'FILE_ID_CACHE_PATH': os.path.join(tempfile.mkdtemp(prefix='plexarrs-bench-'), 'file_id_cache.json'),
+        **overrides,
+    })
+    os.environ.pop('ALLOWED_USER_IDS', None)
+
+
+def stop_fake_upstreams(servers: dict[str, FakeServer]) -> None:
+    for server in servers.values():
+        server.stop()
@@ -0,0 +1,180 @@
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Dispatches every request to the owning FakeServer after its configured latency."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; Nagle plus delayed ACKs would add ~40ms to every response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self) -> None:
+        server: FakeServer = self.server.fake
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        if server.latency:
+            time.sleep(server.latency)
+        server.requests += 1
+        status, payload, headers = server.respond(self.command, urlsplit(self.path), body)
+        if not isinstance(payload, bytes):
+            payload = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = _handle
+
+
+class FakeServer:
+    """Local HTTP stand-in for an upstream service, running on its own thread with a fixed per-request latency."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> 'FakeServer':
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def respond(self, method: str, url, body: bytes) -> tuple[int, object, list[tuple[str, str]]]:
+        raise NotImplementedError
+
+
+class FakeArr(FakeServer):
+    """Radarr/Sonarr v3 API: lookup, library, metadata, system/status and add endpoints."""
+
+    def __init__(self, media_type: str, latency: float = 0.0, lookup_results: int = 100,
+                 library_size: int = 500, overview_size: int = 300):
+        super().__init__(latency)
+        self.media_type = media_type  # 'movie' or 'series'
+        self.lookup_results = lookup_results
+        self.library_size = library_size
+        self.overview_size = overview_size
+        self.added = 0
+        self.added_ids: list[int] = []
+        # Each lookup returns fresh IDs so adds are never short-circuited by the library index
+        self._id_blocks = itertools.count(1)
+        self._id_lock = threading.Lock()
+
+    def _item(self, external_id: int, title: str) -> dict:
+        item = {
+            'title': title,
+            'year': 1990 + external_id % 35,
+            'overview': 'x' * self.overview_size,
+            'images': [{'coverType': 'poster', 'remoteUrl': f'https://image.example/{external_id}.jpg'}],
+            'ratings': {'value': 7.5},
+            'tmdbId': external_id,
+            'tvdbId': external_id,
+        }
+        if self.media_type == 'series':
+            item['seasons'] = [{'seasonNumber': n, 'monitored': True} for n in range(1, 6)]
+        return item
+
+    def respond(self, method, url, body):
+        endpoint = url.path.rsplit('/api/v3/', 1)[-1]
+        if method == 'POST' and endpoint == self.media_type:
+            self.added += 1
+            item = json.loads(body or b'{}')
+            self.added_ids.append(item.get('tmdbId' if self.media_type == 'movie' else 'tvdbId'))
+            return 201, {'id': self.added, **item}, []
+        if endpoint == f'{self.media_type}/lookup':
+            term = parse_qs(url.query).get('term', [''])[0]
+            with self._id_lock:
+                base = next(self._id_blocks) * 100_000
+            if term.startswith('tvdb:'):
+                return 200, [self._item(int(term[5:]), term)], []
+            return 200, [self._item(base + i, f'{term} {i}') for i in range(self.lookup_results)], []
+        if endpoint == self.media_type:
+            return 200, [{'id': i, 'tmdbId': i, 'tvdbId': i, 'title': f'Owned {i}'} for i in range(1, self.library_size + 1)], []
+        if endpoint == 'rootfolder':
+            return 200, [{'id': 1, 'path': f'/data/{self.media_type}'}], []
+        if endpoint in ('qualityprofile', 'languageprofile'):
+            return 200, [{'id': 1, 'name': 'Any'}], []
+        if endpoint == 'tag':
+            return 200, [], []
+        if endpoint == 'system/status':
+            return 200, {'version': '5.0.0'}, []
+        return 404, {'message': 'NotFound'}, []
+
+
+class FakeQBittorrent(FakeServer):
+    """qBittorrent WebAPI v2: login, version and sync/maindata with a large torrent list that changes between syncs."""
+
+    _STATES = ('downloading', 'stalledDL', 'uploading', 'stalledUP', 'pausedUP', 'queuedDL')
+
+    def __init__(self, latency: float = 0.0, torrents: int = 2000, churn: float = 0.05):
+        super().__init__(latency)
+        self.torrents = torrents
+        self.churn = churn
+        self._tick = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _torrent(self, i: int) -> dict:
+        return {
+            'name': f'Some.Linux.Distribution.{i}.x86_64.iso',
+            'progress': (i % 100) / 100,
+            'size': (i % 50 + 1) * 1024 ** 3,
+            'state': self._STATES[i % len(self._STATES)],
+            'dlspeed': (i % 7) * 350_000,
+            'eta': (i % 90) * 60 or 8640000,
+        }
+
+    def respond(self, method, url, body):
+        if url.path.endswith('/auth/login'):
+            return 200, b'Ok.', [('Set-Cookie', 'SID=benchmark; path=/')]
+        if url.path.endswith('/auth/logout'):
+            return 200, b'', []
+        if url.path.endswith('/app/version'):
+            return 200, b'v5.0.0', []
+        if url.path.endswith('/app/webapiVersion'):
+            return 200, b'2.11.2', []
+        if url.path.endswith('/sync/maindata'):
+            params = parse_qs(url.query) | parse_qs(body.decode())
+            rid = int(params.get('rid', ['0'])[0])
+            if rid == 0:
+                torrents = {f'hash{i}': self._torrent(i) for i in range(self.torrents)}
+                return 200, {'rid': 1, 'full_update': True, 'torrents': torrents}, []
+            with self._lock:
+                tick = next(self._tick)
+            changed = max(1, int(self.torrents * self.churn))
+            torrents = {
+                f'hash{(tick * changed + i) % self.torrents}': {'progress': (tick % 100) / 100, 'dlspeed': tick * 1000}
+                for i in range(changed)
+            }
+            return 200, {'rid': rid + 1, 'torrents': torrents}, []
+        return 404, b'Not Found', []
+
+
+class FakeSpotify(FakeServer):
+    """Spotify sync service: saved-items lookup (POST) and sync enable (PUT)."""
+
+    def respond(self, method, url, body):
+        if not url.path.endswith('/api/saved-items'):
+            return 404, {}, []
+        if method == 'POST':
+            return 200, [{'id': 'pl1', 'type': 'spotify-playlist', 'title': 'Benchmark Mix', 'image': 'https://image.example/pl1.jpg'}], []
+        return 200, {'ok': True}, []
@@ -0,0 +1,104 @@
+import asyncio
+import itertools
+import json
+import time
+
+from telegram.request import BaseRequest, RequestData
+
+
+class RecordingRequest(BaseRequest):
+    """Bot API transport that answers every call locally with a plausible result and records it."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: list[tuple[str, dict]] = []
+        self.record = True
+        self._ids = itertools.count(1000)
+
+    @property
+    def read_timeout(self) -> float | None:
+        return 5
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: RequestData | None = None,
+        read_timeout=BaseRequest.DEFAULT_NONE,
+        write_timeout=BaseRequest.DEFAULT_NONE,
+        connect_timeout=BaseRequest.DEFAULT_NONE,
+        pool_timeout=BaseRequest.DEFAULT_NONE,
+    ) -> tuple[int, bytes]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        api_method = url.rsplit('/', 1)[-1]
+        params = {}
+        if request_data:
+            # Encode the call as HTTPXRequest would, so a value Telegram could not receive fails here too
+            if request_data.contains_files:
+                request_data.multipart_data
+            request_data.json_parameters
+            params = request_data.parameters
+        if self.record:
+            self.calls.append((api_method, params))
+        return 200, json.dumps({'ok': True, 'result': self._result(api_method, params)}).encode()
+
+    def _result(self, api_method: str, params: dict) -> object:
+        if api_method == 'getMe':
+            return {'id': 1, 'is_bot': True, 'first_name': 'PlexArrs', 'username': 'plexarrs_bot'}
+        message = {
+            'message_id': next(self._ids),
+            'date': int(time.time()),
+            'chat': {'id': int(params.get('chat_id') or 1), 'type': 'private'},
+        }
+        if api_method in ('sendMessage', 'editMessageText'):
+            return {**message, 'text': params.get('text', '')}
+        if api_method in ('sendPhoto', 'editMessageCaption'):
+            photo = [{'file_id': f"photo{message['message_id']}", 'file_unique_id': 'u', 'width': 1, 'height': 1}]
+            return {**message, 'photo': photo, 'caption': params.get('caption', '')}
+        return True
+
+
+class UpdateFactory:
+    """Builds raw Update payloads for messages, commands and button presses from a given user."""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+
+    def _user(self, user_id: int) -> dict:
+        return {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}'}
+
+    def message(self, user_id: int, text: str) -> dict:
+        message = {
+            'message_id': next(self._ids),
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': self._user(user_id),
+            'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return {'update_id': next(self._ids), 'message': message}
+
+    def callback(self, user_id: int, data: str, with_caption: bool = False) -> dict:
+        message = {'message_id': next(self._ids), 'date': int(time.time()), 'chat': {'id': user_id, 'type': 'private'}}
+        if with_caption:
+            message['caption'] = 'card'
+        else:
+            message['text'] = 'menu'
+        return {
+            'update_id': next(self._ids),
+            'callback_query': {
+                'id': str(next(self._ids)),
+                'from': self._user(user_id),
+                'chat_instance': str(user_id),
+                'data': data,
+                'message': message,
+            },
+        }
@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import itertools
+import logging
+import time
+from collections import defaultdict
+
+from benchmarks.environment import BOT_TOKEN, point_bot_at, start_fake_upstreams, stop_fake_upstreams
+from benchmarks.fake_telegram import RecordingRequest, UpdateFactory
+from benchmarks.report import count_failure_replies, format_latency_table
+
+# Each scenario is one user's walk through the bot: (label, kind, payload) where kind is 'message' or 'callback'
+SCENARIOS: dict[str, list[tuple[str, str, str]]] = {
+    'movie': [
+        ('start', 'message', '/start'),
+        ('search_type_chosen', 'callback', 'movie'),
+        ('search_query_received[movie]', 'message', '{query}'),
+        ('item_chosen', 'callback', 'choose_0'),
+        ('add_item_confirmed[movie]', 'callback', 'confirm_add'),
+    ],
+    'series': [
+        ('search_type_chosen', 'callback', 'series'),
+        ('search_query_received[series]', 'message', '{query}'),
+        ('item_chosen', 'callback', 'choose_0'),
+        ('add_item_confirmed[series]', 'callback', 'confirm_add'),
+    ],
+    'anything': [
+        ('search_type_chosen', 'callback', 'anything'),
+        ('search_query_received[anything]', 'message', '{query}'),
+        ('item_chosen', 'callback', 'choose_1'),
+        ('add_item_confirmed[anything]', 'callback', 'confirm_add'),
+    ],
+    'downloads': [
+        ('downloads_command', 'message', '/downloads'),
+        ('downloads_page_chosen', 'callback', 'dl:downloading:progress:1'),
+        ('downloads_page_chosen', 'callback', 'dl:all:dlspeed:0'),
+    ],
+    'spotify': [
+        ('search_type_chosen', 'callback', 'spotify'),
+        ('search_query_received[spotify]', 'message', 'https://open.spotify.com/playlist/{query}'),
+    ],
+}
+
+
+async def _run_user(application, updates: UpdateFactory, user_id: int, scenarios: list[str], rounds: int,
+                    queries: itertools.count, latencies: dict[str, list[float]] | None) -> int:
+    """Plays the scenarios for one user, timing each update end to end. Returns the number of updates sent."""
+    from telegram import Update
+
+    sent = 0
+    for _ in range(rounds):
+        for scenario in scenarios:
+            query = f'benchmark title {next(queries)}'
+            for label, kind, payload in SCENARIOS[scenario]:
+                text = payload.format(query=query)
+                if kind == 'message':
+                    raw = updates.message(user_id, text)
+                else:
+                    raw = updates.callback(user_id, text, with_caption=label.startswith('add_item_confirmed'))
+                update = Update.de_json(raw, application.bot)
+                started = time.perf_counter()
+                await application.process_update(update)
+                if latencies is not None:
+                    latencies[label].append(time.perf_counter() - started)
+                sent += 1
+    return sent
+
+
+async def run(args: argparse.Namespace) -> None:
+    servers = start_fake_upstreams(args.upstream_latency, args.lookup_results, args.torrents)
+    point_bot_at(servers)
+    # Bot modules read their configuration at import time, so they are imported only now
+    import main
+    from arr_metadata import preload_catalogs
+    from library_index import refresh_libraries
+
+    logging.getLogger().setLevel(args.log_level)
+    request = RecordingRequest(args.telegram_latency)
+    application = main.build_application(BOT_TOKEN, request=request)
+    scenarios = args.scenarios.split(',')
+    updates = UpdateFactory()
+    queries = itertools.count()
+
+    try:
+        async with application:
+            await preload_catalogs()
+            await refresh_libraries()
+            # One unmeasured pass fills connection pools and the first full qBittorrent sync
+            await _run_user(application, updates, 1, scenarios, 1, queries, None)
+            request.calls.clear()
+
+            latencies: dict[str, list[float]] = defaultdict(list)
+            rounds = max(1, args.iterations // args.concurrency)
+            started = time.perf_counter()
+            sent = await asyncio.gather(*(
+                _run_user(application, updates, 1000 + user, scenarios, rounds, queries, latencies)
+                for user in range(args.concurrency)
+            ))
+            elapsed = time.perf_counter() - started
+            await main.post_shutdown(application)
+    finally:
+        stop_fake_upstreams(servers)
+
+    failures = count_failure_replies(request.calls)
+    print(
+        f"\n{sum(sent)} updates from {args.concurrency} concurrent users in {elapsed:.2f}s "
+        f"-> {sum(sent) / elapsed:.1f} updates/s ({len(request.calls)} Bot API calls, {failures} failure replies)\n"
+    )
+    print(format_latency_table(latencies))
+    print("\nUpstream requests: " + ", ".join(f"{name}={server.requests}" for name, server in servers.items()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Times the real bot handlers against local fake upstreams.")
+    parser.add_argument('--iterations', type=int, default=200, help="Scenario rounds in total, split across users.")
+    parser.add_argument('--concurrency', type=int, default=10, help="Users driving the bot at the same time.")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"Comma-separated subset of: {', '.join(SCENARIOS)}.")
+    parser.add_argument('--upstream-latency', type=float, default=0.02, help="Seconds each fake upstream waits per request.")
+    parser.add_argument('--telegram-latency', type=float, default=0.0, help="Seconds each Bot API call takes.")
+    parser.add_argument('--lookup-results', type=int, default=100, help="Items returned by each Radarr/Sonarr lookup.")
+    parser.add_argument('--torrents', type=int, default=2000, help="Torrents in the fake qBittorrent.")
+    parser.add_argument('--log-level', default='WARNING', help="Bot log level while benchmarking.")
+    args = parser.parse_args()
+    unknown = set(args.scenarios.split(',')) - SCENARIOS.keys()
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+import argparse
+import asyncio
+import gc
+import itertools
+import logging
+import os
+import random
+import resource
+import time
+from collections import defaultdict
+
+from benchmarks.environment import BOT_TOKEN, point_bot_at, start_fake_upstreams, stop_fake_upstreams
+from benchmarks.fake_telegram import RecordingRequest, UpdateFactory
+from benchmarks.report import count_failure_replies, percentile
+
+# The full conversation every simulated user walks: SEARCH_TYPE -> SEARCH_QUERY -> CHOOSE_ITEM -> CONFIRM_ADD
+CONVERSATION = [
+    ('search_type', 'callback', '{media_type}'),
+    ('search_query', 'message', '{query}'),
+    ('choose_item', 'callback', 'choose_0'),
+    ('confirm_add', 'callback', 'confirm_add'),
+]
+
+
+def _rss_bytes() -> int:
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LoadMonitor:
+    """Samples event-loop lag, worker thread backlogs, limiter queues and RSS while a load level runs."""
+
+    def __init__(self, request: RecordingRequest, interval: float = 0.05):
+        self.request = request
+        self.interval = interval
+        self.loop_lag: list[float] = []
+        self.max_queue_depth: dict[str, int] = defaultdict(int)
+        self.max_limiter_waiting: dict[str, int] = defaultdict(int)
+        self.peak_rss = 0
+        self.failures = 0
+        self._task: asyncio.Task | None = None
+
+    def _sample(self) -> None:
+        from concurrency import executor_queue_depths, limiter_stats
+
+        loop = asyncio.get_running_loop()
+        # asyncio.to_thread runs on the loop's default executor
+        default_executor = getattr(loop, '_default_executor', None)
+        depths = {'default': default_executor._work_queue.qsize() if default_executor else 0}
+        depths.update(executor_queue_depths())
+        for name, depth in depths.items():
+            self.max_queue_depth[name] = max(self.max_queue_depth[name], depth)
+        for upstream, stats in limiter_stats().items():
+            self.max_limiter_waiting[upstream] = max(self.max_limiter_waiting[upstream], stats['waiting'])
+        self.peak_rss = max(self.peak_rss, _rss_bytes())
+        # Count and drop recorded calls as we go so they do not inflate memory per user
+        self.failures += count_failure_replies(self.request.calls)
+        self.request.calls.clear()
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.loop_lag.append(max(0.0, time.perf_counter() - expected))
+            self._sample()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._sample()
+
+
+async def _simulate_user(application, updates: UpdateFactory, pending: dict[int, asyncio.Future], user_id: int,
+                         args: argparse.Namespace, queries: itertools.count, step_latency: list[float],
+                         timeouts: list[int]) -> None:
+    """One user walking the conversation like a person: waits for each reply, then thinks before the next step."""
+    from telegram import Update
+
+    await asyncio.sleep(random.uniform(0, args.ramp_up))
+    loop = asyncio.get_running_loop()
+    for _ in range(args.rounds):
+        steps = list(CONVERSATION)
+        if random.random() < args.downloads_share:
+            steps.append(('downloads', 'message', '/downloads'))
+        fields = {'media_type': random.choice(('movie', 'series')), 'query': f'load title {next(queries)}'}
+        for name, kind, payload in steps:
+            text = payload.format(**fields)
+            if kind == 'message':
+                raw = updates.message(user_id, text)
+            else:
+                raw = updates.callback(user_id, text, with_caption=name == 'confirm_add')
+            update = Update.de_json(raw, application.bot)
+            done = pending[update.update_id] = loop.create_future()
+            started = time.perf_counter()
+            await application.update_queue.put(update)
+            try:
+                await asyncio.wait_for(done, args.step_timeout)
+                step_latency.append(time.perf_counter() - started)
+            except asyncio.TimeoutError:
+                pending.pop(update.update_id, None)
+                step_latency.append(args.step_timeout)
+                timeouts.append(update.update_id)
+            if args.think_time:
+                await asyncio.sleep(random.uniform(0, args.think_time))
+
+
+async def _run_level(users: int, args: argparse.Namespace, queries: itertools.count) -> dict:
+    """Runs one load level on a fresh application and returns its measurements."""
+    import main
+    from telegram import Update
+    from telegram.ext import TypeHandler
+
+    request = RecordingRequest(args.telegram_latency)
+    application = main.build_application(BOT_TOKEN, request=request)
+    pending: dict[int, asyncio.Future] = {}
+
+    async def mark_done(update: Update, context) -> None:
+        future = pending.pop(update.update_id, None)
+        if future and not future.done():
+            future.set_result(None)
+
+    # Groups run in order, so this fires once the conversation handler has finished with the update
+    application.add_handler(TypeHandler(Update, mark_done), group=1000)
+
+    updates = UpdateFactory()
+    step_latency: list[float] = []
+    timeouts: list[int] = []
+    monitor = LoadMonitor(request)
+    async with application:
+        await application.start()
+        gc.collect()
+        rss_before = _rss_bytes()
+        monitor.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            _simulate_user(application, updates, pending, 10_000 + user, args, queries, step_latency, timeouts)
+            for user in range(users)
+        ))
+        elapsed = time.perf_counter() - started
+        await monitor.stop()
+        await application.stop()
+        await main.post_shutdown(application)
+
+    return {
+        'users': users,
+        'updates': len(step_latency),
+        'updates_per_s': len(step_latency) / elapsed,
+        'step_p50': percentile(step_latency, 50),
+        'step_p95': percentile(step_latency, 95),
+        'step_p99': percentile(step_latency, 99),
+        'lag_p99': percentile(monitor.loop_lag, 99),
+        'lag_max': max(monitor.loop_lag, default=0.0),
+        'queue_depth': dict(monitor.max_queue_depth),
+        'limiter_waiting': dict(monitor.max_limiter_waiting),
+        'rss_per_user': max(0, monitor.peak_rss - rss_before) / users,
+        'failures': monitor.failures,
+        'timeouts': len(timeouts),
+    }
+
+
+def _print_levels(results: list[dict]) -> None:
+    print(
+        f"\n{'users':>6}  {'upd/s':>7}  {'step p50':>9}  {'step p95':>9}  {'step p99':>9}  "
+        f"{'lag p99':>8}  {'lag max':>8}  {'KB/user':>8}  {'fail':>5}  {'t/o':>5}  max thread queue / limiter waiting"
+    )
+    for r in results:
+        queues = ', '.join(f"{name}={depth}" for name, depth in r['queue_depth'].items())
+        waiting = ', '.join(f"{name}={depth}" for name, depth in r['limiter_waiting'].items())
+        print(
+            f"{r['users']:>6}  {r['updates_per_s']:>7.1f}  {r['step_p50'] * 1000:>7.0f}ms  {r['step_p95'] * 1000:>7.0f}ms  "
+            f"{r['step_p99'] * 1000:>7.0f}ms  {r['lag_p99'] * 1000:>6.1f}ms  {r['lag_max'] * 1000:>6.1f}ms  "
+            f"{r['rss_per_user'] / 1024:>8.1f}  {r['failures']:>5}  {r['timeouts']:>5}  {queues} / {waiting}"
+        )
+
+
+async def run(args: argparse.Namespace) -> None:
+    servers = start_fake_upstreams(args.upstream_latency, args.lookup_results, args.torrents)
+    overrides = {}
+    if args.concurrent_updates:
+        overrides['CONCURRENT_UPDATES'] = str(args.concurrent_updates)
+    point_bot_at(servers, **overrides)
+    # Bot modules read their configuration at import time, so they are imported only now
+    import main  # noqa: F401  (sets up the bot's logging)
+    from arr_metadata import preload_catalogs
+    from library_index import refresh_libraries
+    from qb_client import get_qbittorrent_downloads
+    import config
+
+    logging.getLogger().setLevel(args.log_level)
+    print(f"Bot processes up to {config.CONCURRENT_UPDATES} updates at once.")
+    queries = itertools.count()
+    results = []
+    try:
+        await preload_catalogs()
+        await refresh_libraries()
+        # Load the torrent mirror and run an unreported level first, so one-off allocations do not count per user
+        await asyncio.to_thread(get_qbittorrent_downloads)
+        await _run_level(5, args, queries)
+        for users in (int(level) for level in args.users.split(',')):
+            print(f"Running {users} users...")
+            results.append(await _run_level(users, args, queries))
+    finally:
+        stop_fake_upstreams(servers)
+    _print_levels(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Simulates many users walking the full search-and-add conversation through main.build_application."
+    )
+    parser.add_argument('--users', default='50,100,200,400', help="Comma-separated simulated user counts, one level each.")
+    parser.add_argument('--rounds', type=int, default=2, help="Conversations each user completes per level.")
+    parser.add_argument('--think-time', type=float, default=0.5, help="Maximum seconds a user pauses between steps.")
+    parser.add_argument('--ramp-up', type=float, default=2.0, help="Seconds over which users join.")
+    parser.add_argument('--downloads-share', type=float, default=0.3, help="Share of conversations followed by /downloads.")
+    parser.add_argument('--concurrent-updates', type=int, default=0,
+                        help="Overrides CONCURRENT_UPDATES; 0 keeps the bot's own default.")
+    parser.add_argument('--upstream-latency', type=float, default=0.05, help="Seconds each fake upstream waits per request.")
+    parser.add_argument('--telegram-latency', type=float, default=0.05, help="Seconds each Bot API call takes.")
+    parser.add_argument('--lookup-results', type=int, default=100, help="Items returned by each Radarr/Sonarr lookup.")
+    parser.add_argument('--torrents', type=int, default=2000, help="Torrents in the fake qBittorrent.")
+    parser.add_argument('--step-timeout', type=float, default=60.0, help="Seconds before a step counts as timed out.")
+    parser.add_argument('--log-level', default='WARNING', help="Bot log level while load testing.")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import base64
+import itertools
+import logging
+import os
+import socket
+import tempfile
+import time
+from collections import Counter
+
+from benchmarks.environment import BOT_TOKEN, point_bot_at, start_fake_upstreams, stop_fake_upstreams
+from benchmarks.fake_telegram import RecordingRequest, UpdateFactory
+from benchmarks.handlers import _run_user
+from benchmarks.report import percentile
+
+SECRET = 'benchmark'
+
+
+def radarr_import_event(tmdb_id: int, title: str) -> dict:
+    """Trimmed Radarr 'On Import' webhook payload."""
+    return {
+        'eventType': 'Download',
+        'isUpgrade': False,
+        'movie': {'id': tmdb_id, 'title': title, 'year': 1999, 'tmdbId': tmdb_id},
+        'movieFile': {'relativePath': f'{title} (1999).mkv', 'quality': 'Bluray-1080p'},
+    }
+
+
+def sonarr_import_event(tvdb_id: int, title: str, episode: int) -> dict:
+    """Trimmed Sonarr 'On Import' webhook payload for one episode."""
+    return {
+        'eventType': 'Download',
+        'isUpgrade': False,
+        'series': {'id': tvdb_id, 'title': title, 'tvdbId': tvdb_id},
+        'episodes': [{'seasonNumber': 1, 'episodeNumber': episode, 'title': f'Episode {episode}'}],
+        'episodeFile': {'relativePath': f'S01E{episode:02d}.mkv', 'quality': 'WEBDL-1080p'},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def run(args: argparse.Namespace) -> bool:
+    servers = start_fake_upstreams(lookup_results=10)
+    port = _free_port()
+    point_bot_at(
+        servers,
+        NOTIFY_PORT=str(port),
+        NOTIFY_LISTEN='127.0.0.1',
+        NOTIFY_SECRET=SECRET,
+        NOTIFY_REQUESTS_PATH=os.path.join(tempfile.mkdtemp(prefix='plexarrs-notify-'), 'requesters.json'),
+    )
+    # Bot modules read their configuration at import time, so they are imported only now
+    import httpx
+    import main
+    from arr_metadata import preload_catalogs
+    from download_notifier import start_notification_server
+    from library_index import refresh_libraries
+
+    logging.getLogger().setLevel(args.log_level)
+    request = RecordingRequest()
+    application = main.build_application(BOT_TOKEN, request=request)
+    auth = {'Authorization': 'Basic ' + base64.b64encode(f'radarr:{SECRET}'.encode()).decode()}
+    posted: list[tuple[str, dict]] = []
+    post_latency: list[float] = []
+
+    try:
+        async with application:
+            await preload_catalogs()
+            await refresh_libraries()
+            server = await start_notification_server(application.bot)
+            updates = UpdateFactory()
+            # Every user adds one movie and one series through the real conversation. The query counter is
+            # shared, so each user searches different terms and adds items nobody else requested
+            queries = itertools.count()
+            await asyncio.gather(*(
+                _run_user(application, updates, 1000 + user, ['movie', 'series'], 1, queries, None)
+                for user in range(args.users)
+            ))
+            request.calls.clear()
+
+            for tmdb_id in servers['radarr'].added_ids:
+                posted.append(('radarr', radarr_import_event(tmdb_id, f'Movie {tmdb_id}')))
+            for episode in range(1, args.episodes + 1):
+                for tvdb_id in servers['sonarr'].added_ids:
+                    posted.append(('sonarr', sonarr_import_event(tvdb_id, f'Series {tvdb_id}', episode)))
+            # A movie is announced once, so replaying its import must not notify again
+            posted.extend(('radarr', payload) for source, payload in list(posted) if source == 'radarr')
+
+            async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}') as client:
+                test = await client.post('/radarr', json={'eventType': 'Test'}, headers=auth)
+                unauthorized = await client.post('/radarr', json=posted[0][1])
+                for source, payload in posted:
+                    started = time.perf_counter()
+                    response = await client.post(f'/{source}', json=payload, headers=auth)
+                    post_latency.append(time.perf_counter() - started)
+                    response.raise_for_status()
+
+            server.close()
+            await server.wait_closed()
+            await main.post_shutdown(application)
+    finally:
+        stop_fake_upstreams(servers)
+
+    notified = Counter(
+        params.get('chat_id') for method, params in request.calls
+        if method == 'sendMessage' and str(params.get('text', '')).startswith('🎉')
+    )
+    expected_per_user = 1 + args.episodes
+    ok = (
+        test.status_code == 200
+        and unauthorized.status_code == 401
+        and len(notified) == args.users
+        and all(count == expected_per_user for count in notified.values())
+    )
+    print(
+        f"\n{len(posted)} webhook events posted for {args.users} users: "
+        f"p50 {percentile(post_latency, 50) * 1000:.1f} ms, p95 {percentile(post_latency, 95) * 1000:.1f} ms per event"
+    )
+    print(f"Test event -> {test.status_code}, missing secret -> {unauthorized.status_code}")
+    print(
+        f"{sum(notified.values())} completion messages to {len(notified)} chats "
+        f"(expected {expected_per_user} per user): {'OK' if ok else 'MISMATCH'}"
+    )
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Adds items through the real conversation, then posts sample Radarr/Sonarr import webhooks."
+    )
+    parser.add_argument('--users', type=int, default=20, help="Users who each add one movie and one series.")
+    parser.add_argument('--episodes', type=int, default=3, help="Episode import events posted per series.")
+    parser.add_argument('--log-level', default='WARNING', help="Bot log level while running.")
+    args = parser.parse_args()
+    if not asyncio.run(run(args)):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import math
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of unsorted samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def format_latency_table(latencies: dict[str, list[float]]) -> str:
+    """Renders per-label p50/p95/p99/max in milliseconds, one row per label."""
+    width = max([len(label) for label in latencies] + [7])
+    lines = [f"{'handler':<{width}}  {'n':>6}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'max ms':>8}"]
+    for label, samples in latencies.items():
+        lines.append(
+            f"{label:<{width}}  {len(samples):>6}  "
+            + "  ".join(f"{value * 1000:>8.1f}" for value in (
+                percentile(samples, 50), percentile(samples, 95), percentile(samples, 99), max(samples, default=0.0)
+            ))
+        )
+    return "\n".join(lines)
+
+
+# Replies the bot only sends when a handler failed or an upstream refused the call
+FAILURE_MARKERS = ('⚠️ An unexpected error', '❌', '⏳ Radarr is busy', '⏳ Sonarr is busy', '⏳ qBittorrent is busy')
+# Start menu a button handler such as item_chosen edits into the pressed message when it gives up and restarts
+RESTART_PROMPT = 'What would you like to search for?'
+
+
+def count_failure_replies(calls: list[tuple[str, dict]]) -> int:
+    """Counts recorded Bot API calls whose text or caption is a failure reply or a restart from a button."""
+    failures = 0
+    for method, params in calls:
+        text = str(params.get('text') or params.get('caption') or '')
+        if text.startswith(FAILURE_MARKERS) or (method == 'editMessageText' and text.endswith(RESTART_PROMPT)):
+            failures += 1
+    return failures
@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import logging
+import socket
+import time
+from collections import Counter
+
+from benchmarks.environment import BOT_TOKEN, point_bot_at, start_fake_upstreams, stop_fake_upstreams
+from benchmarks.fake_telegram import RecordingRequest, UpdateFactory
+from benchmarks.report import percentile
+
+SECRET = 'benchmark-secret'
+PATH = 'telegram'
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_for_replies(request: RecordingRequest, expected: int, timeout: float) -> None:
+    """Webhook posts return once an update is queued, so wait until the bot has answered them all."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if sum(1 for method, _ in request.calls if method == 'sendMessage') >= expected:
+            return
+        await asyncio.sleep(0.01)
+
+
+async def run(args: argparse.Namespace) -> bool:
+    servers = start_fake_upstreams(lookup_results=10, torrents=10)
+    port = _free_port()
+    point_bot_at(
+        servers,
+        BOT_MODE='webhook',
+        WEBHOOK_URL='https://bot.example.com',
+        WEBHOOK_LISTEN='127.0.0.1',
+        WEBHOOK_PORT=str(port),
+        WEBHOOK_PATH=PATH,
+        WEBHOOK_SECRET_TOKEN=SECRET,
+    )
+    # Bot modules read their configuration at import time, so they are imported only now
+    import httpx
+    import main
+
+    logging.getLogger().setLevel(args.log_level)
+    request = RecordingRequest()
+    application = main.build_application(BOT_TOKEN, request=request)
+    updates = UpdateFactory()
+    post_latency: list[float] = []
+
+    try:
+        async with application:
+            # The same listener run_webhook starts, with the options main passes it
+            await application.updater.start_webhook(**main.webhook_options())
+            await application.start()
+            async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}') as client:
+                headers = {'X-Telegram-Bot-Api-Secret-Token': SECRET}
+                missing_secret = await client.post(f'/{PATH}', json=updates.message(1, '/start'))
+                wrong_secret = await client.post(
+                    f'/{PATH}', json=updates.message(1, '/start'), headers={'X-Telegram-Bot-Api-Secret-Token': 'wrong'}
+                )
+
+                async def post(user_id: int) -> int:
+                    started = time.perf_counter()
+                    response = await client.post(f'/{PATH}', json=updates.message(user_id, '/start'), headers=headers)
+                    post_latency.append(time.perf_counter() - started)
+                    return response.status_code
+
+                started = time.perf_counter()
+                statuses = Counter(await asyncio.gather(*(post(1000 + user) for user in range(args.updates))))
+                await _wait_for_replies(request, args.updates, args.timeout)
+                elapsed = time.perf_counter() - started
+
+            await application.updater.stop()
+            await application.stop()
+            await main.post_shutdown(application)
+    finally:
+        stop_fake_upstreams(servers)
+
+    set_webhook = [params for method, params in request.calls if method == 'setWebhook']
+    replied = {params.get('chat_id') for method, params in request.calls if method == 'sendMessage'}
+    ok = (
+        missing_secret.status_code == 403
+        and wrong_secret.status_code == 403
+        and statuses == Counter({200: args.updates})
+        and len(replied) == args.updates
+        and 1 not in replied
+        and bool(set_webhook)
+        and set_webhook[0].get('secret_token') == SECRET
+    )
+    print(
+        f"\n{args.updates} webhook updates answered in {elapsed:.2f}s -> {args.updates / elapsed:.1f} updates/s "
+        f"(p50 {percentile(post_latency, 50) * 1000:.1f} ms, p95 {percentile(post_latency, 95) * 1000:.1f} ms per POST)"
+    )
+    print(f"Missing secret -> {missing_secret.status_code}, wrong secret -> {wrong_secret.status_code}")
+    print(
+        f"setWebhook sent {'with' if set_webhook and set_webhook[0].get('secret_token') == SECRET else 'WITHOUT'} "
+        f"the secret; {len(replied)} of {args.updates} users answered: {'OK' if ok else 'MISMATCH'}"
+    )
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Starts the bot's webhook listener locally and posts fake updates to it, with and without the secret."
+    )
+    parser.add_argument('--updates', type=int, default=200, help="/start updates posted, one per user.")
+    parser.add_argument('--timeout', type=float, default=30, help="Seconds to wait for the bot to answer them.")
+    parser.add_argument('--log-level', default='WARNING', help="Bot log level while running.")
+    args = parser.parse_args()
+    if not asyncio.run(run(args)):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+
+from config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Raised without contacting the upstream while its circuit is open."""
+
+    def __init__(self, upstream: str):
+        super().__init__(f"{upstream} circuit is open")
+        self.upstream = upstream
+
+
+class CircuitBreaker:
+    """Per-upstream breaker: opens after consecutive failures, then lets a single trial call through to test recovery."""
+
+    def __init__(self, upstream: str, failure_threshold: int, reset_timeout: float):
+        self.upstream = upstream
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_started_at: float | None = None
+        # Shared by the event loop and the qBittorrent worker threads
+        self._lock = threading.Lock()
+
+    @property
+    def retry_due(self) -> bool:
+        """True when the circuit is open and long enough has passed to test the upstream again."""
+        return self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def before_call(self) -> None:
+        """Raises CircuitOpen if the call must not reach the upstream."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self._opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpen(self.upstream)
+                self.state = HALF_OPEN
+                self._trial_started_at = None
+                logger.info(f"Circuit for {self.upstream} is half-open. Sending a trial call.")
+            if self.state == HALF_OPEN:
+                # A trial that never reported back (e.g. cancelled) stops blocking others after reset_timeout
+                if self._trial_started_at is not None and now - self._trial_started_at < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpen(self.upstream)
+                self._trial_started_at = now
+
+    def abandon_trial(self) -> None:
+        """Releases the half-open trial slot of a call that ended without an outcome, e.g. because it was cancelled."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_started_at = None
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit for {self.upstream} closed. {self.upstream} has recovered.")
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_started_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.state = OPEN
+                self.opened += 1
+                self._opened_at = time.monotonic()
+                self._trial_started_at = None
+                logger.warning(
+                    f"Circuit for {self.upstream} opened after {self.failures} consecutive failures. "
+                    f"Failing fast for {self.reset_timeout:g}s."
+                )
+
+    def stats(self) -> dict[str, str | int]:
+        """Returns the current state and counters."""
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'opened': self.opened,
+            'rejected': self.rejected,
+        }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    """Returns the upstream's circuit breaker, shared by every call to it so failures add up in one place."""
+    breaker = _breakers.get(upstream)
+    if breaker is None:
+        breaker = _breakers[upstream] = CircuitBreaker(upstream, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+    return breaker
+
+
+def breaker_stats() -> dict[str, dict[str, str | int]]:
+    """Returns state and counters per upstream."""
+    return {upstream: breaker.stats() for upstream, breaker in _breakers.items()}
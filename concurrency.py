@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, TypeVar
+
+from config import (
+    RADARR_MAX_CONCURRENT,
+    RADARR_MAX_QUEUED,
+    SONARR_MAX_CONCURRENT,
+    SONARR_MAX_QUEUED,
+    SPOTIFY_MAX_CONCURRENT,
+    SPOTIFY_MAX_QUEUED,
+    QBITTORRENT_MAX_CONCURRENT,
+    QBITTORRENT_MAX_QUEUED,
+    RADARR_INSTANCES,
+    SONARR_INSTANCES,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# (max concurrent calls, max waiting calls) per upstream service
+UPSTREAM_LIMITS: dict[str, tuple[int, int]] = {
+    'radarr': (RADARR_MAX_CONCURRENT, RADARR_MAX_QUEUED),
+    'sonarr': (SONARR_MAX_CONCURRENT, SONARR_MAX_QUEUED),
+    'spotify': (SPOTIFY_MAX_CONCURRENT, SPOTIFY_MAX_QUEUED),
+    'qbittorrent': (QBITTORRENT_MAX_CONCURRENT, QBITTORRENT_MAX_QUEUED),
+    **{
+        instance.upstream: (instance.max_concurrent, instance.max_queued)
+        for instance in RADARR_INSTANCES[1:] + SONARR_INSTANCES[1:]
+    },
+}
+DEFAULT_LIMITS = (4, 8)
+
+
+class UpstreamBusy(Exception):
+    """Raised instead of queueing when an upstream already has its maximum of running and waiting calls."""
+
+    def __init__(self, upstream: str):
+        super().__init__(f"{upstream} is busy")
+        self.upstream = upstream
+
+
+class UpstreamLimiter:
+    """Caps concurrent calls to one upstream and how many more may wait for a free slot."""
+
+    def __init__(self, upstream: str, max_concurrent: int, max_queued: int):
+        self.upstream = upstream
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self.active >= self.max_concurrent and self.waiting >= self.max_queued:
+            logger.warning(f"{self.upstream} saturated ({self.active} running, {self.waiting} waiting). Rejecting call.")
+            raise UpstreamBusy(self.upstream)
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+
+_limiters: dict[str, UpstreamLimiter] = {}
+# Blocking clients (qBittorrent) get their own threads so a hung call cannot starve the default executor
+_executors: dict[str, ThreadPoolExecutor] = {}
+
+
+def get_limiter(upstream: str) -> UpstreamLimiter:
+    """Returns the upstream's limiter, sized from UPSTREAM_LIMITS or DEFAULT_LIMITS."""
+    limiter = _limiters.get(upstream)
+    if limiter is None:
+        max_concurrent, max_queued = UPSTREAM_LIMITS.get(upstream, DEFAULT_LIMITS)
+        limiter = _limiters[upstream] = UpstreamLimiter(upstream, max_concurrent, max_queued)
+    return limiter
+
+
+async def run_blocking(upstream: str, func: Callable[..., T], *args) -> T:
+    """Runs a blocking call on the upstream's dedicated thread pool, within its concurrency limit."""
+    limiter = get_limiter(upstream)
+    executor = _executors.get(upstream)
+    if executor is None:
+        executor = _executors[upstream] = ThreadPoolExecutor(
+            max_workers=limiter.max_concurrent, thread_name_prefix=f'{upstream}-worker'
+        )
+    async with limiter.slot():
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+def limiter_stats() -> dict[str, dict[str, int]]:
+    """Returns running and waiting call counts per upstream."""
+    return {
+        upstream: {'active': limiter.active, 'waiting': limiter.waiting, 'max_concurrent': limiter.max_concurrent}
+        for upstream, limiter in _limiters.items()
+    }
+
+
+def executor_queue_depths() -> dict[str, int]:
+    """Returns how many blocking calls are queued behind busy worker threads, per upstream."""
+    # ThreadPoolExecutor has no public accessor for its backlog
+    return {upstream: executor._work_queue.qsize() for upstream, executor in _executors.items()}
+
+
+def shutdown_executors() -> None:
+    """Stops the dedicated worker threads without waiting for hung calls and cancels queued ones."""
+    for executor in _executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors.clear()
@@ -1,6 +1,7 @@
 import os
 import sys
 import logging
+from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
@@ -9,29 +10,192 @@ DEFAULT_TIMEOUT: int = 15
 CONNECT_TIMEOUT: int = 10
 READ_TIMEOUT: int = 20
 
+# HTTP connection pools (per upstream)
+HTTP_KEEPALIVE_EXPIRY: float = float(os.environ.get('HTTP_KEEPALIVE_EXPIRY', 30))
+RADARR_POOL_SIZE: int = int(os.environ.get('RADARR_POOL_SIZE', 10))
+SONARR_POOL_SIZE: int = int(os.environ.get('SONARR_POOL_SIZE', 10))
+SPOTIFY_POOL_SIZE: int = int(os.environ.get('SPOTIFY_POOL_SIZE', 4))
+
+# Concurrent calls allowed per upstream, and how many more may wait before users are told it is busy
+RADARR_MAX_CONCURRENT: int = int(os.environ.get('RADARR_MAX_CONCURRENT', RADARR_POOL_SIZE))
+RADARR_MAX_QUEUED: int = int(os.environ.get('RADARR_MAX_QUEUED', 20))
+SONARR_MAX_CONCURRENT: int = int(os.environ.get('SONARR_MAX_CONCURRENT', SONARR_POOL_SIZE))
+SONARR_MAX_QUEUED: int = int(os.environ.get('SONARR_MAX_QUEUED', 20))
+SPOTIFY_MAX_CONCURRENT: int = int(os.environ.get('SPOTIFY_MAX_CONCURRENT', SPOTIFY_POOL_SIZE))
+SPOTIFY_MAX_QUEUED: int = int(os.environ.get('SPOTIFY_MAX_QUEUED', 8))
+# qBittorrent calls are blocking and run on their own worker threads
+QBITTORRENT_MAX_CONCURRENT: int = int(os.environ.get('QBITTORRENT_MAX_CONCURRENT', 2))
+QBITTORRENT_MAX_QUEUED: int = int(os.environ.get('QBITTORRENT_MAX_QUEUED', 8))
+
+# Consecutive upstream failures that open its circuit, and seconds it stays open before recovery is tested
+CIRCUIT_FAILURE_THRESHOLD: int = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RESET_TIMEOUT: int = int(os.environ.get('CIRCUIT_RESET_TIMEOUT', 30))
+
+# Retries of idempotent upstream reads (GETs) after transient failures
+RETRY_MAX_ATTEMPTS: int = max(1, int(os.environ.get('RETRY_MAX_ATTEMPTS', 3)))
+RETRY_BACKOFF_BASE: float = float(os.environ.get('RETRY_BACKOFF_BASE', 0.5))
+RETRY_BACKOFF_MAX: float = float(os.environ.get('RETRY_BACKOFF_MAX', 4))
+# Total seconds one read may take across all of its attempts
+RETRY_DEADLINE: float = float(os.environ.get('RETRY_DEADLINE', 20))
+
+# Seconds before cached Radarr/Sonarr metadata (root folders, profiles, tags) is reloaded
+METADATA_TTL: int = int(os.environ.get('METADATA_TTL', 3600))
+
+# Seconds between background rebuilds of the local Radarr/Sonarr library index
+LIBRARY_REFRESH_INTERVAL: int = int(os.environ.get('LIBRARY_REFRESH_INTERVAL', 900))
+
+# Movie/series lookup result cache
+SEARCH_CACHE_TTL: int = int(os.environ.get('SEARCH_CACHE_TTL', 600))
+SEARCH_CACHE_SIZE: int = int(os.environ.get('SEARCH_CACHE_SIZE', 256))
+# Number of search hits kept and shown per query
+SEARCH_RESULT_LIMIT: int = int(os.environ.get('SEARCH_RESULT_LIMIT', 10))
+# Inline mode (@bot query): wait this long after the last keystroke before looking up, and ignore shorter queries
+INLINE_DEBOUNCE: float = float(os.environ.get('INLINE_DEBOUNCE', 0.5))
+INLINE_MIN_QUERY_LENGTH: int = int(os.environ.get('INLINE_MIN_QUERY_LENGTH', 3))
+# Items a bulk add (or a pasted title list) submits or looks up at the same time
+BULK_ADD_CONCURRENCY: int = max(1, int(os.environ.get('BULK_ADD_CONCURRENCY', 3)))
+
+# Poster/playlist image URL -> Telegram file_id cache, persisted across restarts
+FILE_ID_CACHE_PATH: str = os.environ.get('FILE_ID_CACHE_PATH', 'data/file_id_cache.json')
+FILE_ID_CACHE_SIZE: int = int(os.environ.get('FILE_ID_CACHE_SIZE', 2000))
+
 # Telegram
 TELEGRAM_BOT_TOKEN: str | None = os.environ.get('TELEGRAM_BOT_TOKEN')
+# How updates are received: 'polling' (default) or 'webhook'
+BOT_MODE: str = os.environ.get('BOT_MODE', 'polling').strip().lower()
+WEBHOOK_URL: str | None = os.environ.get('WEBHOOK_URL')
+WEBHOOK_LISTEN: str = os.environ.get('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT: int = int(os.environ.get('WEBHOOK_PORT', 8443))
+WEBHOOK_PATH: str = os.environ.get('WEBHOOK_PATH', 'telegram').strip('/')
+WEBHOOK_SECRET_TOKEN: str | None = os.environ.get('WEBHOOK_SECRET_TOKEN')
+WEBHOOK_MAX_CONNECTIONS: int = int(os.environ.get('WEBHOOK_MAX_CONNECTIONS', 40))
+# Updates processed in parallel; webhook mode defaults to handling as many as Telegram may push at once
+CONCURRENT_UPDATES: int = int(
+    os.environ.get('CONCURRENT_UPDATES', WEBHOOK_MAX_CONNECTIONS if BOT_MODE == 'webhook' else 1)
+)
 
 # Sonarr
 SONARR_URL: str | None = os.environ.get('SONARR_URL')
 SONARR_API_KEY: str | None = os.environ.get('SONARR_API_KEY')
-SONARR_ROOT_FOLDER_ID: int = int(os.environ.get('SONARR_ROOT_FOLDER_ID', 1))
-SONARR_QUALITY_PROFILE_ID: int = int(os.environ.get('SONARR_QUALITY_PROFILE_ID', 1))
 
 # Radarr
 RADARR_URL: str | None = os.environ.get('RADARR_URL')
 RADARR_API_KEY: str | None = os.environ.get('RADARR_API_KEY')
-RADARR_ROOT_FOLDER_ID: int = int(os.environ.get('RADARR_ROOT_FOLDER_ID', 1))
-RADARR_QUALITY_PROFILE_ID: int = int(os.environ.get('RADARR_QUALITY_PROFILE_ID', 1))
+
+
+@dataclass(frozen=True)
+class ArrInstance:
+    """One Radarr/Sonarr server. The first of each service is the primary, which also serves lookups."""
+    upstream: str
+    name: str
+    url: str | None
+    api_key: str | None
+    root_folder_id: int
+    quality_profile_id: int
+    pool_size: int
+    max_concurrent: int
+    max_queued: int
+    add_by_default: bool
+
+    @property
+    def is_primary(self) -> bool:
+        return self.upstream in ('radarr', 'sonarr')
+
+
+def _arr_instances(
+    service: str, url: str | None, api_key: str | None, pool_size: int, max_concurrent: int, max_queued: int
+) -> list[ArrInstance]:
+    """Builds the primary instance from its URL and key (e.g. RADARR_URL) plus RADARR_ROOT_FOLDER_ID and friends,
+    and extra ones from RADARR_2_URL, RADARR_3_URL, ...
+
+    Extra instances default to the primary's IDs and limits, and only receive adds when selected unless
+    their <PREFIX>_ADD_BY_DEFAULT is set.
+    """
+    prefix = service.upper()
+
+    def env(key: str, default: str | int | None = None) -> str | None:
+        value = os.environ.get(f'{prefix}_{key}')
+        return value if value is not None else default
+
+    primary = ArrInstance(
+        upstream=service.lower(),
+        name=env('NAME', service),
+        url=url,
+        api_key=api_key,
+        root_folder_id=int(env('ROOT_FOLDER_ID', 1)),
+        quality_profile_id=int(env('QUALITY_PROFILE_ID', 1)),
+        pool_size=pool_size,
+        max_concurrent=max_concurrent,
+        max_queued=max_queued,
+        add_by_default=env('ADD_BY_DEFAULT', 'true').lower() in ('1', 'true', 'yes'),
+    )
+    instances = [primary]
+    index = 2
+    while env(f'{index}_URL'):
+        extra_pool_size = int(env(f'{index}_POOL_SIZE', pool_size))
+        instances.append(ArrInstance(
+            upstream=f'{primary.upstream}_{index}',
+            name=env(f'{index}_NAME', f'{service} {index}'),
+            url=env(f'{index}_URL'),
+            api_key=env(f'{index}_API_KEY'),
+            root_folder_id=int(env(f'{index}_ROOT_FOLDER_ID', primary.root_folder_id)),
+            quality_profile_id=int(env(f'{index}_QUALITY_PROFILE_ID', primary.quality_profile_id)),
+            pool_size=extra_pool_size,
+            max_concurrent=int(env(f'{index}_MAX_CONCURRENT', extra_pool_size)),
+            max_queued=int(env(f'{index}_MAX_QUEUED', max_queued)),
+            add_by_default=env(f'{index}_ADD_BY_DEFAULT', 'false').lower() in ('1', 'true', 'yes'),
+        ))
+        index += 1
+    return instances
+
+
+# Every Radarr/Sonarr instance, primary first. The primary keeps the un-numbered RADARR_*/SONARR_* variables
+RADARR_INSTANCES: list[ArrInstance] = _arr_instances(
+    'Radarr', RADARR_URL, RADARR_API_KEY, RADARR_POOL_SIZE, RADARR_MAX_CONCURRENT, RADARR_MAX_QUEUED
+)
+SONARR_INSTANCES: list[ArrInstance] = _arr_instances(
+    'Sonarr', SONARR_URL, SONARR_API_KEY, SONARR_POOL_SIZE, SONARR_MAX_CONCURRENT, SONARR_MAX_QUEUED
+)
+# Instances per media type, as carried by SearchResult.media_type
+ARR_INSTANCES: dict[str, list[ArrInstance]] = {'movie': RADARR_INSTANCES, 'series': SONARR_INSTANCES}
+
+
+def default_instances(media_type: str) -> list[ArrInstance]:
+    """Instances an add goes to when none were picked: those with ADD_BY_DEFAULT, else just the primary."""
+    instances = ARR_INSTANCES[media_type]
+    return [instance for instance in instances if instance.add_by_default] or instances[:1]
+
 
 # qBittorrent
 QBITTORRENT_URL: str | None = os.environ.get('QBITTORRENT_URL')
 QBITTORRENT_USERNAME: str | None = os.environ.get('QBITTORRENT_USERNAME')
 QBITTORRENT_PASSWORD: str | None = os.environ.get('QBITTORRENT_PASSWORD')
+DOWNLOADS_PAGE_SIZE: int = int(os.environ.get('DOWNLOADS_PAGE_SIZE', 15))
+# Telegram throttles frequent edits of the same message, so live updates never refresh faster than 3s
+DOWNLOADS_LIVE_INTERVAL: int = max(3, int(os.environ.get('DOWNLOADS_LIVE_INTERVAL', 10)))
+DOWNLOADS_LIVE_DURATION: int = int(os.environ.get('DOWNLOADS_LIVE_DURATION', 300))
 
 # Spotify (Optional)
 SPOTIFY_API_URL: str | None = os.environ.get('SPOTIFY_API_URL')
 
+# Prometheus metrics endpoint; disabled (0) by default. Bound to localhost unless METRICS_LISTEN says otherwise
+METRICS_PORT: int = int(os.environ.get('METRICS_PORT', 0))
+METRICS_LISTEN: str = os.environ.get('METRICS_LISTEN', '127.0.0.1')
+# /stats latency percentiles cover the last STATS_WINDOW seconds, from at most STATS_SAMPLES calls per upstream
+STATS_WINDOW: int = int(os.environ.get('STATS_WINDOW', 300))
+STATS_SAMPLES: int = int(os.environ.get('STATS_SAMPLES', 500))
+# Fraction of handler runs profiled with cProfile (0 disables sampling; /profile can still arm captures)
+PROFILE_SAMPLE_RATE: float = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR: str = os.environ.get('PROFILE_DIR', 'data/profiles')
+PROFILE_MAX_FILES: int = max(1, int(os.environ.get('PROFILE_MAX_FILES', 50)))
+
+# Radarr/Sonarr import webhook receiver for download notifications; disabled (0) by default
+NOTIFY_PORT: int = int(os.environ.get('NOTIFY_PORT', 0))
+NOTIFY_LISTEN: str = os.environ.get('NOTIFY_LISTEN', '0.0.0.0')
+NOTIFY_SECRET: str | None = os.environ.get('NOTIFY_SECRET')
+NOTIFY_REQUESTS_PATH: str = os.environ.get('NOTIFY_REQUESTS_PATH', 'data/requesters.json')
+NOTIFY_MAX_REQUESTS: int = int(os.environ.get('NOTIFY_MAX_REQUESTS', 2000))
+
 # Allowed Telegram User IDs
 _allowed_users_raw: str | None = os.environ.get('ALLOWED_USER_IDS')
 ALLOWED_USER_IDS: list[int] | None = (
@@ -40,6 +204,14 @@ ALLOWED_USER_IDS: list[int] | None = (
     else None
 )
 
+# Admins may use /stats; only IDs that are also allowed users count
+_admin_users_raw: str | None = os.environ.get('ADMIN_USER_IDS')
+ADMIN_USER_IDS: list[int] = (
+    [int(uid.strip()) for uid in _admin_users_raw.split(',') if uid.strip()]
+    if _admin_users_raw
+    else []
+)
+
 
 def validate_config() -> None:
     """Validates that all required environment variables are set."""
@@ -51,6 +223,13 @@ def validate_config() -> None:
         'RADARR_API_KEY': RADARR_API_KEY,
         'QBITTORRENT_URL': QBITTORRENT_URL,
     }
+    if BOT_MODE == 'webhook':
+        required_vars['WEBHOOK_URL'] = WEBHOOK_URL
+    elif BOT_MODE != 'polling':
+        logger.critical(f"Invalid BOT_MODE '{BOT_MODE}'. Use 'polling' or 'webhook'. Exiting.")
+        sys.exit(1)
+    for instance in RADARR_INSTANCES[1:] + SONARR_INSTANCES[1:]:
+        required_vars[f'{instance.upstream.upper()}_API_KEY'] = instance.api_key
     missing = [name for name, val in required_vars.items() if not val]
     if missing:
         logger.critical(f"Missing required environment variables: {', '.join(missing)}. Exiting.")
@@ -59,6 +238,15 @@ def validate_config() -> None:
     logger.info(
         f"Configuration loaded successfully. Allowed users: {ALLOWED_USER_IDS if ALLOWED_USER_IDS else 'All allowed'}"
     )
+    if ALLOWED_USER_IDS and any(uid not in ALLOWED_USER_IDS for uid in ADMIN_USER_IDS):
+        logger.warning("ADMIN_USER_IDS contains IDs missing from ALLOWED_USER_IDS; they cannot use /stats.")
+    if NOTIFY_PORT and not NOTIFY_SECRET:
+        logger.warning("Download notifications without NOTIFY_SECRET: anyone who reaches the port can send messages.")
+    if BOT_MODE == 'webhook' and not WEBHOOK_SECRET_TOKEN:
+        logger.warning("Webhook mode without WEBHOOK_SECRET_TOKEN: anyone who finds the URL can post updates.")
+    for instances in (RADARR_INSTANCES, SONARR_INSTANCES):
+        if len(instances) > 1:
+            logger.info(f"{len(instances)} instances configured: {', '.join(instance.name for instance in instances)}.")
     if SPOTIFY_API_URL:
         logger.info(f"Spotify integration enabled with URL: {SPOTIFY_API_URL}")
     else:
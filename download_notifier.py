@@ -0,0 +1,194 @@
+import asyncio
+import base64
+import binascii
+import hmac
+import html
+import json
+import logging
+
+from telegram import Bot
+from telegram.error import Forbidden
+
+from config import NOTIFY_PORT, NOTIFY_LISTEN, NOTIFY_SECRET, NOTIFY_REQUESTS_PATH, NOTIFY_MAX_REQUESTS
+from persistent_lru import PersistentLRU
+
+logger = logging.getLogger(__name__)
+
+# Largest webhook body accepted; Radarr/Sonarr import events are a few KB
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class RequesterRegistry(PersistentLRU[list[int]]):
+    """Bounded LRU map from an added movie (tmdbId) or series (tvdbId) to the chats that asked for it, persisted as JSON."""
+
+    label = 'requester registry'
+
+    @staticmethod
+    def _key(media_type: str, external_id: int) -> str:
+        return f"{media_type}:{external_id}"
+
+    def _parse_value(self, value: object) -> list[int]:
+        if not isinstance(value, list):
+            raise TypeError(f"expected a list of chat ids, got {type(value).__name__}")
+        return [int(chat_id) for chat_id in value]
+
+    def _copy_value(self, value: list[int]) -> list[int]:
+        return list(value)
+
+    def record(self, media_type: str, external_id: int | None, chat_id: int) -> None:
+        """Remembers that chat_id added the item, so its import can be announced there."""
+        if external_id is None:
+            return
+        self._ensure_loaded()
+        key = self._key(media_type, external_id)
+        chat_ids = self._entries.setdefault(key, [])
+        if chat_id not in chat_ids:
+            chat_ids.append(chat_id)
+        self._touch(key)
+        self._dirty = True
+
+    def requesters(self, media_type: str, external_id: int) -> list[int]:
+        self._ensure_loaded()
+        return list(self._entries.get(self._key(media_type, external_id), []))
+
+    def forget(self, media_type: str, external_id: int, chat_id: int | None = None) -> None:
+        """Drops one chat, or every chat when chat_id is None, from an item's requesters."""
+        key = self._key(media_type, external_id)
+        chat_ids = self._entries.get(key)
+        if chat_ids is None:
+            return
+        if chat_id is not None and chat_id in chat_ids:
+            chat_ids.remove(chat_id)
+        if chat_id is None or not chat_ids:
+            del self._entries[key]
+        self._dirty = True
+
+
+requester_registry = RequesterRegistry(NOTIFY_REQUESTS_PATH, NOTIFY_MAX_REQUESTS)
+
+
+def parse_import_event(source: str, payload: dict) -> tuple[str, int, str] | None:
+    """Turns a Radarr/Sonarr 'On Import' webhook payload into (media_type, external_id, message).
+
+    Returns None for other events (Grab, Test, ...), for upgrades of files already in the library
+    and for payloads missing the movie or series ID.
+    """
+    if payload.get('eventType') != 'Download' or payload.get('isUpgrade'):
+        return None
+
+    if source == 'radarr':
+        movie = payload.get('movie') or {}
+        external_id = movie.get('tmdbId')
+        if not external_id:
+            return None
+        title = html.escape(str(movie.get('title') or 'Your movie'))
+        year = f" ({movie['year']})" if movie.get('year') else ''
+        return 'movie', int(external_id), f"🎉 <b>{title}{year}</b> has finished downloading and is ready to watch."
+
+    if source == 'sonarr':
+        series = payload.get('series') or {}
+        external_id = series.get('tvdbId')
+        if not external_id:
+            return None
+        title = html.escape(str(series.get('title') or 'Your series'))
+        episodes = [
+            # The keys may be present but null, so fall back with `or` rather than a .get default
+            f"S{int(episode.get('seasonNumber') or 0):02d}E{int(episode.get('episodeNumber') or 0):02d}"
+            + (f" – {html.escape(str(episode['title']))}" if episode.get('title') else '')
+            for episode in payload.get('episodes') or []
+            if isinstance(episode, dict)
+        ]
+        episode_text = '\n' + '\n'.join(episodes) if episodes else ''
+        return 'series', int(external_id), f"🎉 New episode of <b>{title}</b> is ready to watch.{episode_text}"
+
+    return None
+
+
+async def notify_requesters(bot: Bot, source: str, payload: dict) -> int:
+    """Sends the completion message for an import event to every chat that requested the item. Returns the number sent."""
+    event = parse_import_event(source, payload)
+    if event is None:
+        logger.info(f"Ignoring {source} webhook event '{payload.get('eventType')}'.")
+        return 0
+    media_type, external_id, message = event
+    sent = 0
+    for chat_id in requester_registry.requesters(media_type, external_id):
+        try:
+            await bot.send_message(chat_id=chat_id, text=message, parse_mode='HTML')
+            sent += 1
+        except Forbidden:
+            logger.info(f"Chat {chat_id} blocked the bot; no longer notifying it about {media_type} {external_id}.")
+            requester_registry.forget(media_type, external_id, chat_id)
+        except Exception as e:
+            logger.warning(f"Could not notify chat {chat_id} about {media_type} {external_id}: {e}")
+    # A movie is imported once; series keep their requesters for the following episodes
+    if media_type == 'movie':
+        requester_registry.forget(media_type, external_id)
+    logger.info(f"Import of {media_type} {external_id} announced to {sent} chat(s).")
+    return sent
+
+
+def _authorized(headers: dict[str, str]) -> bool:
+    """Checks the Basic auth password Radarr/Sonarr send when the webhook has one configured."""
+    if not NOTIFY_SECRET:
+        return True
+    scheme, _, credentials = headers.get('authorization', '').partition(' ')
+    if scheme.lower() != 'basic':
+        return False
+    try:
+        _, _, password = base64.b64decode(credentials).decode('utf-8').partition(':')
+    except (binascii.Error, UnicodeDecodeError):
+        return False
+    return hmac.compare_digest(password, NOTIFY_SECRET)
+
+
+def _make_handler(bot: Bot):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        status = '400 Bad Request'
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            headers = {}
+            while (line := await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            parts = request_line.decode('latin-1').split()
+            source = parts[1].split('?')[0].strip('/') if len(parts) >= 2 else ''
+            length = int(headers.get('content-length') or 0)
+
+            if len(parts) < 2 or parts[0] != 'POST' or source not in ('radarr', 'sonarr'):
+                status = '404 Not Found'
+            elif not _authorized(headers):
+                status = '401 Unauthorized'
+            elif length > MAX_BODY_SIZE:
+                status = '413 Payload Too Large'
+            else:
+                body = await asyncio.wait_for(reader.readexactly(length), timeout=5)
+                payload = json.loads(body)
+                if isinstance(payload, dict):
+                    await notify_requesters(bot, source, payload)
+                    status = '200 OK'
+        except (ValueError, TypeError, UnicodeDecodeError) as e:
+            logger.warning(f"Rejected malformed webhook event: {e}")
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError) as e:
+            logger.debug(f"Webhook event aborted: {e}")
+        except Exception:
+            # Still answer and close the connection, so Radarr/Sonarr are not left waiting
+            logger.exception("Failed to handle webhook event")
+            status = '500 Internal Server Error'
+        try:
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def start_notification_server(bot: Bot) -> asyncio.AbstractServer | None:
+    """Receives Radarr/Sonarr webhooks at /radarr and /sonarr on NOTIFY_LISTEN:NOTIFY_PORT if enabled."""
+    if NOTIFY_PORT <= 0:
+        return None
+    server = await asyncio.start_server(_make_handler(bot), NOTIFY_LISTEN, NOTIFY_PORT)
+    logger.info(f"Listening for Radarr/Sonarr import webhooks on http://{NOTIFY_LISTEN}:{NOTIFY_PORT}/radarr and /sonarr")
+    return server
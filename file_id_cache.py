@@ -0,0 +1,50 @@
+from config import FILE_ID_CACHE_PATH, FILE_ID_CACHE_SIZE
+from persistent_lru import PersistentLRU
+
+
+class FileIdCache(PersistentLRU[str]):
+    """Bounded LRU map from image URL to the Telegram file_id of its first upload, persisted as JSON."""
+
+    label = 'file_id cache'
+
+    def __init__(self, path: str, max_entries: int):
+        super().__init__(path, max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    def _parse_value(self, value: object) -> str:
+        return str(value)
+
+    def get(self, url: str) -> str | None:
+        self._ensure_loaded()
+        file_id = self._entries.get(url)
+        if file_id is not None:
+            self._entries.move_to_end(url)
+            self.hits += 1
+        else:
+            self.misses += 1
+        return file_id
+
+    def put(self, url: str, file_id: str) -> None:
+        self._ensure_loaded()
+        self._entries[url] = file_id
+        self._touch(url)
+        self._dirty = True
+
+    def discard(self, url: str) -> None:
+        """Drops a file_id Telegram no longer accepts."""
+        if self._entries.pop(url, None) is not None:
+            self._dirty = True
+
+    def stats(self) -> dict[str, int | float]:
+        """Returns hit/miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+file_id_cache = FileIdCache(FILE_ID_CACHE_PATH, FILE_ID_CACHE_SIZE)
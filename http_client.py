@@ -0,0 +1,56 @@
+import logging
+import httpx
+
+from config import (
+    DEFAULT_TIMEOUT,
+    CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE_EXPIRY,
+    RADARR_POOL_SIZE,
+    SONARR_POOL_SIZE,
+    SPOTIFY_POOL_SIZE,
+    RADARR_INSTANCES,
+    SONARR_INSTANCES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Maximum pooled connections per upstream service
+POOL_SIZES: dict[str, int] = {
+    'radarr': RADARR_POOL_SIZE,
+    'sonarr': SONARR_POOL_SIZE,
+    'spotify': SPOTIFY_POOL_SIZE,
+    # Extra Radarr/Sonarr instances (e.g. 'radarr_2') get a pool of their own
+    **{instance.upstream: instance.pool_size for instance in RADARR_INSTANCES[1:] + SONARR_INSTANCES[1:]},
+}
+DEFAULT_POOL_SIZE = 4
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def get_client(upstream: str) -> httpx.AsyncClient:
+    """Returns the upstream's keep-alive client, replacing it if it was closed."""
+    client = _clients.get(upstream)
+    if client is None or client.is_closed:
+        pool_size = POOL_SIZES.get(upstream, DEFAULT_POOL_SIZE)
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=CONNECT_TIMEOUT),
+            headers={'Accept-Encoding': 'gzip, deflate'},
+        )
+        _clients[upstream] = client
+        logger.info(f"Created HTTP connection pool for {upstream} (max {pool_size} connections).")
+    return client
+
+
+async def close_clients() -> None:
+    """Closes every pooled client and its open connections."""
+    for upstream, client in list(_clients.items()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close HTTP client for {upstream}: {e}")
+    _clients.clear()
@@ -0,0 +1,72 @@
+import json
+import logging
+from typing import Collection
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # Optional: the stdlib parser is used when orjson is not installed
+    orjson = None
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def loads(data: bytes | str) -> object:
+    """Decodes a JSON document with orjson when it is installed, else with the stdlib parser.
+
+    Raises json.JSONDecodeError on invalid input either way (orjson.JSONDecodeError subclasses it).
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _project(item: object, fields: Collection[str] | None) -> object:
+    if fields is None or not isinstance(item, dict):
+        return item
+    return {field: item[field] for field in fields if field in item}
+
+
+def _skip_whitespace(text: str, index: int) -> int:
+    while index < len(text) and text[index] in _WHITESPACE:
+        index += 1
+    return index
+
+
+def decode_array(data: bytes, limit: int | None = None, fields: Collection[str] | None = None) -> object:
+    """Decodes a JSON response, keeping only the first limit elements of a top-level array and only the given
+    fields of each object element.
+
+    With a limit, elements are decoded one at a time with the stdlib scanner and decoding stops after limit
+    of them, so the rest of a large lookup response is never turned into Python objects; that beats even a
+    full orjson parse. Without one, a single full parse is faster than the per-element loop, so the whole
+    body goes through loads() and is projected afterwards. Documents that are not arrays are returned whole.
+    Raises json.JSONDecodeError on invalid input.
+    """
+    if limit is None:
+        result = loads(data)
+        if not isinstance(result, list):
+            return result
+        return [_project(item, fields) for item in result] if fields is not None else result
+
+    text = data.decode('utf-8-sig') if isinstance(data, bytes) else data
+    index = _skip_whitespace(text, 0)
+    if not text.startswith('[', index):
+        return json.loads(text)
+
+    items = []
+    index = _skip_whitespace(text, index + 1)
+    if text.startswith(']', index):
+        return items
+    while limit is None or len(items) < limit:
+        item, index = _decoder.raw_decode(text, index)
+        items.append(_project(item, fields))
+        index = _skip_whitespace(text, index)
+        if text.startswith(']', index):
+            break
+        if not text.startswith(',', index):
+            raise json.JSONDecodeError("Expecting ',' delimiter", text, index)
+        index = _skip_whitespace(text, index + 1)
+    return items
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import time
+
+from config import (
+    RADARR_URL,
+    RADARR_API_KEY,
+    SONARR_URL,
+    SONARR_API_KEY,
+)
+from models import SearchResult
+from utils import make_api_request
+
+logger = logging.getLogger(__name__)
+
+
+class LibraryIndex:
+    """In-memory set of the tmdb/tvdb IDs already in a Radarr/Sonarr library."""
+
+    def __init__(self, upstream: str, service_name: str, base_url: str | None, api_key: str | None, endpoint: str, id_field: str):
+        self.upstream = upstream
+        self.service_name = service_name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.id_field = id_field
+        self._ids: set[int] = set()
+        # IDs added while a rebuild is fetching the library, merged into the rebuilt set
+        self._added_during_refresh: set[int] | None = None
+        self.refreshed_at: float | None = None
+
+    def __contains__(self, external_id: int | None) -> bool:
+        return external_id is not None and external_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, external_id: int | None) -> None:
+        """Records a single item between full refreshes, e.g. right after it was added."""
+        if external_id is not None:
+            self._ids.add(external_id)
+            if self._added_during_refresh is not None:
+                self._added_during_refresh.add(external_id)
+
+    async def refresh(self) -> bool:
+        """Rebuilds the index from the full library list. Only ever called from background jobs."""
+        if not self.base_url or not self.api_key:
+            return False
+        started = time.monotonic()
+        self._added_during_refresh = set()
+        try:
+            # Library items carry files, images and statistics; only the ID is kept
+            items = await make_api_request(
+                self.upstream, self.base_url, self.api_key, self.endpoint, fields=(self.id_field,)
+            )
+            if not isinstance(items, list):
+                logger.warning(f"Could not refresh {self.service_name} library index. Keeping {len(self._ids)} known items.")
+                return False
+            # Swap in a new set so membership checks never see a half-built index. Items added after the
+            # fetch started may be missing from the response, so they are carried over
+            self._ids = {
+                item[self.id_field] for item in items if isinstance(item, dict) and item.get(self.id_field)
+            } | self._added_during_refresh
+        finally:
+            self._added_during_refresh = None
+        self.refreshed_at = time.monotonic()
+        logger.info(
+            f"{self.service_name} library index refreshed: {len(self._ids)} items in {self.refreshed_at - started:.1f}s."
+        )
+        return True
+
+
+radarr_library = LibraryIndex('radarr', 'Radarr', RADARR_URL, RADARR_API_KEY, 'movie', 'tmdbId')
+sonarr_library = LibraryIndex('sonarr', 'Sonarr', SONARR_URL, SONARR_API_KEY, 'series', 'tvdbId')
+LIBRARIES: dict[str, LibraryIndex] = {'movie': radarr_library, 'series': sonarr_library}
+
+
+def in_library(item: SearchResult) -> bool:
+    """Checks whether a search result is already in its service's library."""
+    library = LIBRARIES.get(item.media_type)
+    return library is not None and item.external_id in library
+
+
+async def refresh_libraries() -> None:
+    """Rebuilds every library index concurrently."""
+    await asyncio.gather(*(library.refresh() for library in LIBRARIES.values()))
@@ -1,5 +1,8 @@
+import asyncio
 import logging
+import sys
 from telegram import BotCommand
+from telegram.request import BaseRequest
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -8,17 +11,52 @@ from telegram.ext import (
     CallbackContext,
     ConversationHandler,
     CallbackQueryHandler,
+    InlineQueryHandler,
 )
 
-from config import TELEGRAM_BOT_TOKEN, validate_config
+from config import (
+    TELEGRAM_BOT_TOKEN,
+    METADATA_TTL,
+    LIBRARY_REFRESH_INTERVAL,
+    CIRCUIT_RESET_TIMEOUT,
+    RADARR_INSTANCES,
+    SONARR_INSTANCES,
+    BOT_MODE,
+    CONCURRENT_UPDATES,
+    WEBHOOK_URL,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PORT,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET_TOKEN,
+    WEBHOOK_MAX_CONNECTIONS,
+    validate_config,
+)
+from http_client import close_clients
+from concurrency import run_blocking, shutdown_executors
+from circuit_breaker import get_breaker
+from utils import make_api_request
+from metrics import register_collectors, start_metrics_server
+from arr_metadata import preload_catalogs, refresh_catalogs
+from library_index import refresh_libraries
+from file_id_cache import file_id_cache
+from download_notifier import requester_registry, start_notification_server
+from qb_client import close_qbittorrent_client, ping_qbittorrent
 from telegram_handlers import (
     start,
     help_command,
     downloads_command,
+    downloads_page_chosen,
+    stats_command,
+    profile_command,
+    inline_query_received,
+    inline_add_chosen,
     search_type_chosen,
     search_query_received,
     item_chosen,
     add_item_confirmed,
+    add_target_toggled,
+    selection_toggled,
+    bulk_add_confirmed,
     cancel_conversation,
     cancel_conversation_and_restart,
     _restart_conversation,
@@ -37,20 +75,138 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-if __name__ == '__main__':
-    """Start the bot."""
-    validate_config()
+async def refresh_metadata_job(context: CallbackContext) -> None:
+    """Reloads Radarr/Sonarr metadata in the background so adds never wait for it."""
+    await refresh_catalogs()
+
+
+async def refresh_library_job(context: CallbackContext) -> None:
+    """Rebuilds the Radarr/Sonarr library index off the request path."""
+    await refresh_libraries()
+
+
+async def save_persistent_state_job(context: CallbackContext) -> None:
+    """Persists newly learned Telegram file_ids and download requesters."""
+    await file_id_cache.save()
+    await requester_registry.save()
+
+
+# Cheap health checks used to test an upstream whose circuit is open. Spotify has none and recovers on next use.
+HEALTH_CHECKS = {
+    **{
+        instance.upstream: lambda instance=instance: make_api_request(
+            instance.upstream, instance.url, instance.api_key, 'system/status'
+        )
+        for instance in RADARR_INSTANCES + SONARR_INSTANCES
+    },
+    'qbittorrent': lambda: run_blocking('qbittorrent', ping_qbittorrent),
+}
+
+
+async def probe_circuits_job(context: CallbackContext) -> None:
+    """Probes upstreams whose circuit is open, so they recover and stop serving stale data without waiting for users."""
+    for upstream, health_check in HEALTH_CHECKS.items():
+        if get_breaker(upstream).retry_due:
+            logger.info(f"Probing {upstream} for recovery.")
+            try:
+                await health_check()
+            except Exception as e:
+                logger.warning(f"Recovery probe for {upstream} failed: {e}")
+
+
+async def post_init(application: Application) -> None:
+    """Preloads Radarr/Sonarr metadata and refuses to start if the configured IDs do not exist."""
+    problems = await preload_catalogs()
+    if problems:
+        for problem in problems:
+            logger.critical(problem)
+        application.bot_data['startup_failed'] = True
+        application.stop_running()
+        return
+
+    register_collectors(application.user_data)
+    application.bot_data['metrics_server'] = await start_metrics_server()
+    application.bot_data['notification_server'] = await start_notification_server(application.bot)
+
+    if application.job_queue:
+        application.job_queue.run_repeating(refresh_metadata_job, interval=METADATA_TTL / 2, first=METADATA_TTL / 2)
+        application.job_queue.run_repeating(refresh_library_job, interval=LIBRARY_REFRESH_INTERVAL, first=0)
+        application.job_queue.run_repeating(save_persistent_state_job, interval=60, first=60)
+        application.job_queue.run_repeating(probe_circuits_job, interval=CIRCUIT_RESET_TIMEOUT / 2, first=CIRCUIT_RESET_TIMEOUT)
+
 
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+async def post_shutdown(application: Application) -> None:
+    """Releases upstream connections and the qBittorrent session, and saves the file_id cache and requesters, when the bot stops."""
+    for server_key in ('metrics_server', 'notification_server'):
+        server = application.bot_data.get(server_key)
+        if server:
+            server.close()
+            await server.wait_closed()
+    await close_clients()
+    await asyncio.to_thread(close_qbittorrent_client)
+    shutdown_executors()
+    await file_id_cache.save()
+    await requester_registry.save()
+    logger.info("Upstream clients closed.")
+
+
+# Define base commands for Telegram UI menu
+BASE_COMMANDS = [
+    BotCommand("start", "Iniciar una nueva búsqueda"),
+    BotCommand("downloads", "Ver descargas actuales"),
+    BotCommand("help", "Mostrar ayuda"),
+    BotCommand("cancel", "Cancelar la operación actual"),
+]
+
+
+async def post_init_commands(context_param: CallbackContext) -> None:
+    try:
+        await context_param.bot.set_my_commands(BASE_COMMANDS)
+        logger.info("Bot commands successfully set.")
+    except Exception as e:
+        logger.error(f"Failed to set bot commands: {e}", exc_info=True)
+
+
+def webhook_options() -> dict:
+    """Arguments for run_webhook/start_webhook built from the WEBHOOK_* settings."""
+    return {
+        'listen': WEBHOOK_LISTEN,
+        'port': WEBHOOK_PORT,
+        'url_path': WEBHOOK_PATH,
+        'webhook_url': f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+        'secret_token': WEBHOOK_SECRET_TOKEN,
+        'max_connections': WEBHOOK_MAX_CONNECTIONS,
+    }
+
+
+def build_application(token: str, request: BaseRequest | None = None) -> Application:
+    """Builds the bot with all handlers registered. A custom request lets tests run it against a fake Bot API."""
+    builder = (
+        Application.builder()
+        .token(token)
+        .concurrent_updates(CONCURRENT_UPDATES)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    if request is not None:
+        builder = builder.request(request).get_updates_request(request)
+    application = builder.build()
 
     # Conversation handler for the search/add process
     conv_handler = ConversationHandler(
-        entry_points=[CallbackQueryHandler(search_type_chosen, pattern='^movie$|^series$|^spotify$')],
+        entry_points=[CallbackQueryHandler(search_type_chosen, pattern='^movie$|^series$|^anything$|^spotify$')],
         states={
             SEARCH_TYPE: [CallbackQueryHandler(search_type_chosen)],
             SEARCH_QUERY: [MessageHandler(filters.TEXT & ~filters.COMMAND, search_query_received)],
-            CHOOSE_ITEM: [CallbackQueryHandler(item_chosen, pattern='^choose_\\d+$|^cancel$|^backtosearch$')],
-            CONFIRM_ADD: [CallbackQueryHandler(add_item_confirmed, pattern='^confirm_add$|^cancel_add$|^back_to_results$')],
+            CHOOSE_ITEM: [
+                CallbackQueryHandler(item_chosen, pattern='^choose_\\d+$|^cancel$|^backtosearch$'),
+                CallbackQueryHandler(selection_toggled, pattern='^select_\\d+$'),
+                CallbackQueryHandler(bulk_add_confirmed, pattern='^bulk_add$'),
+            ],
+            CONFIRM_ADD: [
+                CallbackQueryHandler(add_item_confirmed, pattern='^confirm_add$|^cancel_add$|^back_to_results$'),
+                CallbackQueryHandler(add_target_toggled, pattern='^target_'),
+            ],
         },
         fallbacks=[
             CommandHandler('cancel', cancel_conversation),
@@ -66,30 +222,35 @@ if __name__ == '__main__':
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("downloads", downloads_command))
+    application.add_handler(CallbackQueryHandler(downloads_page_chosen, pattern='^dl:'))
+    application.add_handler(CommandHandler("stats", stats_command))
+    application.add_handler(CommandHandler("profile", profile_command))
+    application.add_handler(InlineQueryHandler(inline_query_received))
+    application.add_handler(CallbackQueryHandler(inline_add_chosen, pattern='^iadd:'))
     application.add_handler(CommandHandler("cancel", cancel_conversation))
     application.add_handler(CallbackQueryHandler(_restart_conversation, pattern='^back_to_start$'))
 
     # Global Error Handler
     application.add_error_handler(global_error_handler)
 
-    # Define base commands for Telegram UI menu
-    base_commands = [
-        BotCommand("start", "Iniciar una nueva búsqueda"),
-        BotCommand("downloads", "Ver descargas actuales"),
-        BotCommand("help", "Mostrar ayuda"),
-        BotCommand("cancel", "Cancelar la operación actual"),
-    ]
-
-    async def post_init_commands(context_param: CallbackContext) -> None:
-        try:
-            await context_param.bot.set_my_commands(base_commands)
-            logger.info("Bot commands successfully set.")
-        except Exception as e:
-            logger.error(f"Failed to set bot commands: {e}", exc_info=True)
-
     if application.job_queue:
         application.job_queue.run_once(post_init_commands, when=0)
 
-    logger.info("Starting PlexArrs bot...")
-    application.run_polling()
+    return application
+
+
+if __name__ == '__main__':
+    """Start the bot."""
+    validate_config()
+
+    application = build_application(TELEGRAM_BOT_TOKEN)
+
+    if BOT_MODE == 'webhook':
+        logger.info(f"Starting PlexArrs bot in webhook mode on {WEBHOOK_LISTEN}:{WEBHOOK_PORT}/{WEBHOOK_PATH}...")
+        application.run_webhook(**webhook_options())
+    else:
+        logger.info("Starting PlexArrs bot...")
+        application.run_polling()
     logger.info("Bot stopped.")
+    if application.bot_data.get('startup_failed'):
+        sys.exit(1)
@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Mapping
+
+from config import METRICS_PORT, METRICS_LISTEN, STATS_WINDOW, STATS_SAMPLES
+from concurrency import executor_queue_depths, limiter_stats
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, breaker_stats
+from search_cache import search_cache
+
+logger = logging.getLogger(__name__)
+
+# Metrics are only collected when the endpoint is enabled, so the default setup pays nothing for them
+ENABLED = METRICS_PORT > 0
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STARTED_AT = time.monotonic()
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+        # Incremented from the event loop and from the qBittorrent worker threads
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds."""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> (count per bucket, +Inf count, sum)
+        self._values: dict[tuple[str, ...], tuple[list[int], int, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            counts, total, value_sum = self._values.get(label_values) or ([0] * len(self.buckets), 0, 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[label_values] = (counts, total + 1, value_sum + value)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total, value_sum) in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    bucket_labels = _format_labels(self.labels, label_values, f'le="{bound:g}"')
+                    lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+                bucket_labels = _format_labels(self.labels, label_values, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {total}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {value_sum:g}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {total}")
+        return lines
+
+
+class Gauge:
+    """Point-in-time values read from a callback at scrape time, one sample per returned label tuple."""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.collect: Callable[[], dict[tuple[str, ...], float]] = dict
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            samples = self.collect()
+        except Exception as e:
+            logger.warning(f"Could not collect {self.name}: {e}")
+            samples = {}
+        for label_values, value in sorted(samples.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value:g}")
+        return lines
+
+
+upstream_requests = Counter(
+    'plexarrs_upstream_requests_total', "Upstream calls by endpoint and outcome (HTTP status or error).",
+    ('upstream', 'endpoint', 'status'),
+)
+upstream_errors = Counter(
+    'plexarrs_upstream_errors_total', "Upstream calls that failed, were refused by the circuit breaker or were rejected as busy.",
+    ('upstream', 'endpoint'),
+)
+upstream_duration = Histogram(
+    'plexarrs_upstream_request_duration_seconds', "Upstream call latency.", ('upstream', 'endpoint'),
+)
+handler_duration = Histogram(
+    'plexarrs_handler_duration_seconds', "Telegram handler run time, including upstream and Bot API calls.", ('handler',),
+)
+handler_errors = Counter('plexarrs_handler_errors_total', "Telegram handler runs that raised.", ('handler',))
+active_conversations = Gauge('plexarrs_active_conversations', "Users with a search conversation in progress.")
+executor_queue_depth = Gauge(
+    'plexarrs_executor_queue_depth', "Blocking calls waiting for a worker thread.", ('upstream',),
+)
+upstream_in_flight = Gauge(
+    'plexarrs_upstream_in_flight', "Upstream calls running or waiting for a concurrency slot.", ('upstream', 'phase'),
+)
+circuit_state = Gauge(
+    'plexarrs_circuit_state', "Circuit breaker state: 0 closed, 1 half-open, 2 open.", ('upstream',),
+)
+search_cache_lookups = Gauge(
+    'plexarrs_search_cache_lookups', "Search cache lookups since start by result.", ('result',),
+)
+
+REGISTRY = (
+    upstream_requests, upstream_errors, upstream_duration, handler_duration, handler_errors,
+    active_conversations, executor_queue_depth, upstream_in_flight, circuit_state, search_cache_lookups,
+)
+
+
+class LatencyWindow:
+    """Ring buffer of the most recent call durations, for percentiles over a sliding time window."""
+
+    def __init__(self, max_samples: int, window: float):
+        self.window = window
+        self._samples: deque[tuple[float, float]] = deque(maxlen=max_samples)
+
+    def add(self, duration: float) -> None:
+        # deque.append is atomic, so the qBittorrent worker threads need no lock here
+        self._samples.append((time.monotonic(), duration))
+
+    def percentiles(self, *quantiles: float) -> tuple[int, list[float]]:
+        """Returns the number of samples within the window and the requested quantiles of their durations."""
+        cutoff = time.monotonic() - self.window
+        durations = sorted(duration for at, duration in list(self._samples) if at >= cutoff)
+        if not durations:
+            return 0, []
+        return len(durations), [durations[min(len(durations) - 1, int(q * len(durations)))] for q in quantiles]
+
+
+# Always kept, so /stats works without the metrics endpoint
+_recent_latencies: dict[str, LatencyWindow] = {}
+
+
+def latency_summary() -> dict[str, tuple[int, float, float]]:
+    """Returns (sample count, p50, p95) per upstream over the last STATS_WINDOW seconds."""
+    summary = {}
+    for upstream, window in sorted(_recent_latencies.items()):
+        count, values = window.percentiles(0.5, 0.95)
+        if count:
+            summary[upstream] = (count, values[0], values[1])
+    return summary
+
+
+def count_active_conversations(user_data: Mapping[int, dict]) -> int:
+    """Counts users with a search conversation in progress."""
+    return sum(1 for data in list(user_data.values()) if data.get('search_type'))
+
+
+def process_rss() -> int | None:
+    """Returns the resident set size of this process in bytes, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def record_upstream(upstream: str, endpoint: str, status: str, duration: float | None) -> None:
+    """Records one upstream call. status is the HTTP status code or an error name; duration is None if nothing was sent."""
+    if duration is not None:
+        window = _recent_latencies.get(upstream)
+        if window is None:
+            window = _recent_latencies.setdefault(upstream, LatencyWindow(STATS_SAMPLES, STATS_WINDOW))
+        window.add(duration)
+    if not ENABLED:
+        return
+    upstream_requests.inc(upstream, endpoint, status)
+    if not status.isdigit() or int(status) >= 400:
+        upstream_errors.inc(upstream, endpoint)
+    if duration is not None:
+        upstream_duration.observe(duration, upstream, endpoint)
+
+
+def record_handler(handler: str, duration: float, failed: bool) -> None:
+    """Records one Telegram handler run."""
+    if not ENABLED:
+        return
+    handler_duration.observe(duration, handler)
+    if failed:
+        handler_errors.inc(handler)
+
+
+_CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def register_collectors(user_data: Mapping[int, dict]) -> None:
+    """Points the scrape-time gauges at their sources. user_data is the application's per-user data."""
+    active_conversations.collect = lambda: {(): count_active_conversations(user_data)}
+    executor_queue_depth.collect = lambda: {(upstream,): depth for upstream, depth in executor_queue_depths().items()}
+    upstream_in_flight.collect = lambda: {
+        (upstream, phase): stats[key]
+        for upstream, stats in limiter_stats().items()
+        for phase, key in (('running', 'active'), ('waiting', 'waiting'))
+    }
+    circuit_state.collect = lambda: {
+        (upstream,): _CIRCUIT_STATE_VALUES[stats['state']] for upstream, stats in breaker_stats().items()
+    }
+    search_cache_lookups.collect = lambda: {
+        (result,): search_cache.stats()[result] for result in ('hits', 'misses', 'coalesced', 'stale_served')
+    }
+
+
+def render() -> str:
+    """Renders every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+async def _handle_scrape(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        # Drain the headers; the body of a GET is empty
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+            pass
+        parts = request_line.decode('latin-1').split()
+        if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+            status, content_type, body = '200 OK', 'text/plain; version=0.0.4; charset=utf-8', render().encode()
+        else:
+            status, content_type, body = '404 Not Found', 'text/plain; charset=utf-8', b'Not Found\n'
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError) as e:
+        logger.debug(f"Metrics scrape aborted: {e}")
+    finally:
+        writer.close()
+
+
+async def start_metrics_server() -> asyncio.AbstractServer | None:
+    """Serves /metrics on METRICS_LISTEN:METRICS_PORT if the endpoint is enabled."""
+    if not ENABLED:
+        return None
+    server = await asyncio.start_server(_handle_scrape, METRICS_LISTEN, METRICS_PORT)
+    logger.info(f"Metrics available at http://{METRICS_LISTEN}:{METRICS_PORT}/metrics")
+    return server
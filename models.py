@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+
+
+# Lookup item fields read by SearchResult.from_lookup and the library check after a lookup
+LOOKUP_FIELDS = ('id', 'title', 'year', 'tmdbId', 'tvdbId', 'overview', 'images', 'ratings', 'seasons')
+
+
+@dataclass(frozen=True, slots=True)
+class SearchResult:
+    """Compact search hit holding only what the result list, the confirmation card and the add calls need."""
+
+    media_type: str  # 'movie' or 'series'
+    title: str
+    year: int | None
+    external_id: int | None  # tmdbId for movies, tvdbId for series
+    overview: str
+    poster_url: str | None
+    rating: float | None
+    # (seasonNumber, monitored) per season of a series, sent back when it is added
+    seasons: tuple[tuple[int, bool], ...] = ()
+
+    @classmethod
+    def from_lookup(cls, media_type: str, item: dict) -> 'SearchResult':
+        """Builds a compact record from a raw Radarr/Sonarr lookup item."""
+        poster_url = None
+        images = item.get('images', [])
+        if isinstance(images, list):
+            poster_info = next((img for img in images if isinstance(img, dict) and img.get('coverType') == 'poster'), None)
+            if poster_info:
+                poster_url = poster_info.get('remoteUrl') or poster_info.get('url')
+
+        rating = None
+        ratings_data = item.get('ratings')
+        if isinstance(ratings_data, dict) and ratings_data.get('value') is not None:
+            rating = ratings_data['value']
+
+        seasons = item.get('seasons')
+        season_list = tuple(
+            (season['seasonNumber'], bool(season.get('monitored', True)))
+            for season in seasons
+            if isinstance(season, dict) and isinstance(season.get('seasonNumber'), int)
+        ) if isinstance(seasons, list) else ()
+
+        title = item.get('title')
+        overview = item.get('overview')
+        return cls(
+            media_type=media_type,
+            title=str(title) if title is not None else 'N/A',
+            year=item.get('year') or None,
+            external_id=item.get('tmdbId' if media_type == 'movie' else 'tvdbId'),
+            overview=str(overview) if overview is not None else 'No description available.',
+            poster_url=poster_url,
+            rating=rating,
+            seasons=season_list,
+        )
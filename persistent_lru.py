@@ -0,0 +1,93 @@
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar('V')
+
+
+class PersistentLRU(Generic[V]):
+    """Bounded LRU map from string keys, loaded lazily from a JSON object file and saved back atomically.
+
+    Subclasses turn stored JSON values into entries (_parse_value) and copy entries for saving (_copy_value).
+    Entries only ever change on the event loop.
+    """
+
+    # Name used in log messages, e.g. 'file_id cache'
+    label = 'cache'
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, V] = OrderedDict()
+        self._loaded = False
+        self._dirty = False
+
+    def _parse_value(self, value: object) -> V:
+        """Converts one stored JSON value into an entry. Raises TypeError or ValueError to skip it."""
+        return value
+
+    def _copy_value(self, value: V) -> object:
+        """Returns a copy of an entry that later changes on the event loop cannot affect."""
+        return value
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read {self.label} {self.path}: {e}. Starting empty.")
+            return
+        if isinstance(data, dict):
+            for key, value in data.items():
+                try:
+                    self._entries[str(key)] = self._parse_value(value)
+                except (TypeError, ValueError):
+                    continue
+            self._trim()
+        logger.info(f"Loaded {len(self._entries)} {self.label} entries from {self.path}.")
+
+    def _touch(self, key: str) -> None:
+        """Marks key as most recently used and evicts the oldest entries beyond max_entries."""
+        self._entries.move_to_end(key)
+        self._trim()
+
+    def _trim(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def save(self) -> None:
+        """Writes the entries to disk atomically if they changed since the last save.
+
+        The copy is taken on the event loop, so the worker thread that encodes and writes it never iterates
+        entries that are being changed.
+        """
+        if not self._dirty:
+            return
+        snapshot = {key: self._copy_value(value) for key, value in self._entries.items()}
+        self._dirty = False
+        if not await asyncio.to_thread(self._write, snapshot):
+            self._dirty = True
+
+    def _write(self, snapshot: dict) -> bool:
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError as e:
+            logger.warning(f"Could not write {self.label} {self.path}: {e}")
+            return False
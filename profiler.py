@@ -0,0 +1,88 @@
+import asyncio
+import cProfile
+import logging
+import os
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from config import PROFILE_DIR, PROFILE_SAMPLE_RATE, PROFILE_MAX_FILES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class HandlerProfiler:
+    """Profiles a sampled fraction of handler runs with cProfile and writes each run to a rotating pstats file.
+
+    cProfile follows the thread, not the task, so a capture also includes whatever else the event loop
+    ran while the handler was awaiting. Only one capture runs at a time.
+    """
+
+    def __init__(self, directory: str, sample_rate: float, max_files: int):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self.armed = 0
+        self.captured = 0
+        self._active = False
+
+    def arm(self, count: int) -> None:
+        """Profiles the next count handler runs regardless of the sample rate; 0 disarms."""
+        self.armed = max(0, count)
+
+    def _take_sample(self) -> bool:
+        if self._active:
+            return False
+        if self.armed > 0:
+            self.armed -= 1
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def run(self, name: str, func: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """Awaits func(*args, **kwargs), profiling it if this run is sampled."""
+        if not self._take_sample():
+            return await func(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Python 3.12+ refuses to start while another profiler or debugger is attached
+            logger.warning(f"Could not start profiling {name}: {e}")
+            return await func(*args, **kwargs)
+        self._active = True
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._active = False
+            await asyncio.to_thread(self._save, profile, name)
+
+    def _save(self, profile: cProfile.Profile, name: str) -> None:
+        self.captured += 1
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.captured:05d}-{name}.prof"
+        path = os.path.join(self.directory, filename)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.dump_stats(path)
+        except OSError as e:
+            logger.warning(f"Could not write profile {path}: {e}")
+            return
+        logger.info(f"Wrote handler profile {path}")
+        self._rotate()
+
+    def _rotate(self) -> None:
+        """Deletes the oldest profiles beyond max_files."""
+        try:
+            paths = [
+                os.path.join(self.directory, entry) for entry in os.listdir(self.directory) if entry.endswith('.prof')
+            ]
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:-self.max_files]:
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not rotate profiles in {self.directory}: {e}")
+
+
+handler_profiler = HandlerProfiler(PROFILE_DIR, PROFILE_SAMPLE_RATE, PROFILE_MAX_FILES)
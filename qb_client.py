@@ -1,4 +1,7 @@
 import logging
+import threading
+import time
+from typing import Callable, TypeVar
 import qbittorrentapi
 import requests
 import html
@@ -9,70 +12,248 @@ from config import (
     CONNECT_TIMEOUT,
     READ_TIMEOUT,
 )
+from circuit_breaker import CircuitOpen, get_breaker
+from retry_policy import RetryBudget
+from metrics import record_upstream
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
 
-def get_qbittorrent_downloads() -> tuple[str | None, str | None]:
-    """Connects to qBittorrent using qbittorrent-api and fetches the list of active downloads."""
-    if not QBITTORRENT_URL:
-        logger.error("QBITTORRENT_URL not configured.")
-        return None, "qBittorrent URL not configured."
+# Long-lived client shared by every /downloads call; guarded because calls arrive from worker threads
+_client: qbittorrentapi.Client | None = None
+_logged_in = False
+_client_lock = threading.Lock()
+
+
+def _get_client() -> qbittorrentapi.Client:
+    """Returns the shared qBittorrent client, logging in first if this process has no session yet."""
+    global _client, _logged_in
+    with _client_lock:
+        if _client is None:
+            _client = qbittorrentapi.Client(
+                host=QBITTORRENT_URL,
+                username=QBITTORRENT_USERNAME,
+                password=QBITTORRENT_PASSWORD,
+                REQUESTS_ARGS={'timeout': (CONNECT_TIMEOUT, READ_TIMEOUT)}
+            )
+        # Client.is_logged_in costs a round trip, so track the session locally instead
+        if not _logged_in:
+            _client.auth_log_in()
+            _logged_in = True
+            logger.info(f"Successfully logged in to qBittorrent at {QBITTORRENT_URL}")
+        return _client
+
+
+def _call_guarded(endpoint: str, func: Callable[[qbittorrentapi.Client], T]) -> T:
+    """Runs func against the shared client behind the qBittorrent circuit breaker, retrying transient failures.
 
-    # Initialize client
-    client = qbittorrentapi.Client(
-        host=QBITTORRENT_URL,
-        username=QBITTORRENT_USERNAME,
-        password=QBITTORRENT_PASSWORD,
-        REQUESTS_ARGS={'timeout': (CONNECT_TIMEOUT, READ_TIMEOUT)}
-    )
+    An expired session (SID) needs no handling here: qbittorrent-api logs in again and repeats the call
+    itself when qBittorrent answers 403.
 
+    Only used for reads, so repeating func is safe. endpoint names the call in metrics.
+    Raises CircuitOpen while the circuit is open.
+    """
+    breaker = get_breaker('qbittorrent')
+    budget = RetryBudget()
+    while True:
+        attempt = budget.start_attempt()
+        try:
+            breaker.before_call()
+        except CircuitOpen:
+            record_upstream('qbittorrent', endpoint, 'circuit_open', None)
+            raise
+        started = time.perf_counter()
+        try:
+            result = func(_get_client())
+        except (qbittorrentapi.HTTP4XXError, qbittorrentapi.LoginFailed) as e:
+            # qBittorrent answered, so it is up even though the call was refused
+            breaker.record_success()
+            record_upstream('qbittorrent', endpoint, type(e).__name__, time.perf_counter() - started)
+            raise
+        except (qbittorrentapi.APIConnectionError, requests.exceptions.RequestException) as e:
+            breaker.record_failure()
+            record_upstream('qbittorrent', endpoint, type(e).__name__, time.perf_counter() - started)
+            delay = budget.next_delay()
+            if delay is None:
+                raise
+            logger.warning(
+                f"Transient qBittorrent failure ({e}). Retrying in {delay:.2f}s (attempt {attempt + 1}/{budget.max_attempts})."
+            )
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        record_upstream('qbittorrent', endpoint, '200', time.perf_counter() - started)
+        return result
+
+
+def ping_qbittorrent() -> bool:
+    """Cheap health check used to probe qBittorrent for recovery while its circuit is open."""
     try:
-        client.auth_log_in()
-        logger.info(f"Successfully logged in to qBittorrent at {QBITTORRENT_URL}")
+        _call_guarded('app/version', lambda client: client.app_version())
+        return True
+    except Exception as e:
+        logger.info(f"qBittorrent is still unreachable: {e}")
+        return False
 
-        torrents = client.torrents_info()
 
-        if not torrents:
-            return "No active downloads found.", None
+def close_qbittorrent_client() -> None:
+    """Ends the qBittorrent session, if any, so the next call logs in on a fresh client."""
+    global _client, _logged_in
+    with _client_lock:
+        if _client is None:
+            return
+        try:
+            if _logged_in:
+                _client.auth_log_out()
+                logger.info("Logged out from qBittorrent.")
+        except Exception as e:
+            logger.warning(f"Failed to log out from qBittorrent: {e}")
+        _client = None
+        _logged_in = False
+
+
+# Torrent fields /downloads formats, filters and sorts on; the ~50 others qBittorrent sends are not mirrored
+TORRENT_FIELDS = ('name', 'progress', 'size', 'state', 'dlspeed', 'eta')
+
+# Local mirror of qBittorrent's torrent list keyed by hash, kept current with sync/maindata deltas
+_torrents: dict[str, dict] = {}
+_rid = 0
+_synced_at: float | None = None
+_sync_lock = threading.Lock()
+
+
+def _sync_torrents() -> list[dict]:
+    """Applies the next sync/maindata delta to the local torrent table and returns a snapshot of it."""
+    global _rid, _synced_at
+    with _sync_lock:
+        data = _call_guarded('sync/maindata', lambda client: client.sync_maindata(rid=_rid))
+        if data.get('full_update'):
+            _torrents.clear()
+        for torrent_hash, changes in (data.get('torrents') or {}).items():
+            # Replace rather than mutate so snapshots handed to other threads never change underneath them
+            kept = {field: changes[field] for field in TORRENT_FIELDS if field in changes}
+            if kept or torrent_hash not in _torrents:
+                _torrents[torrent_hash] = {**_torrents.get(torrent_hash, {'hash': torrent_hash}), **kept}
+        for torrent_hash in data.get('torrents_removed') or []:
+            _torrents.pop(torrent_hash, None)
+        _rid = data.get('rid', _rid)
+        _synced_at = time.time()
+        return list(_torrents.values())
 
-        message_lines = ["<b>Current Downloads:</b>\n"]
-        bar_len = 10
 
-        for torrent in torrents:
-            name = html.escape(torrent.name[:26])
-            progress = torrent.progress
-            percent = int(progress * 100)
-            size_gb = round(torrent.size / (1024 ** 3), 2)
+# Torrent states grouped the same way as the qBittorrent WebUI status filters
+_DOWNLOADING_STATES = frozenset({
+    'downloading', 'metaDL', 'forcedMetaDL', 'stalledDL', 'checkingDL',
+    'pausedDL', 'stoppedDL', 'queuedDL', 'forcedDL',
+})
+_SEEDING_STATES = frozenset({'uploading', 'stalledUP', 'checkingUP', 'queuedUP', 'forcedUP'})
+_COMPLETED_STATES = _SEEDING_STATES | {'pausedUP', 'stoppedUP'}
+_STALLED_STATES = frozenset({'stalledDL', 'stalledUP'})
 
-            filled_len = int(progress * bar_len)
-            empty_len = bar_len - filled_len
-            bar = '█' * filled_len + '░' * empty_len
+STATUS_FILTERS: dict[str, frozenset[str] | None] = {
+    'all': None,
+    'downloading': _DOWNLOADING_STATES,
+    'seeding': _SEEDING_STATES,
+    'stalled': _STALLED_STATES,
+    'completed': _COMPLETED_STATES,
+}
 
-            line = f"{name} [{bar}] {percent}% - {size_gb} GB"
-            message_lines.append(line)
+# Sortable torrent fields mapped to whether they sort descending
+SORT_KEYS: dict[str, bool] = {
+    'progress': True,
+    'dlspeed': True,
+    'eta': False,
+}
 
-        return "\n".join(message_lines), None
+# qBittorrent reports this ETA for torrents that will never finish
+_INFINITE_ETA = 8640000
 
+
+def _format_torrent_line(torrent: dict) -> str:
+    """Formats a single torrent as a progress bar line."""
+    bar_len = 10
+    name = html.escape(str(torrent.get('name', ''))[:26])
+    progress = torrent.get('progress', 0)
+    percent = int(progress * 100)
+    size_gb = round(torrent.get('size', 0) / (1024 ** 3), 2)
+
+    filled_len = int(progress * bar_len)
+    empty_len = bar_len - filled_len
+    bar = '█' * filled_len + '░' * empty_len
+
+    line = f"{name} [{bar}] {percent}% - {size_gb} GB"
+    dlspeed = torrent.get('dlspeed', 0)
+    if dlspeed >= 1024 ** 2:
+        line += f" ⬇ {round(dlspeed / (1024 ** 2), 1)} MB/s"
+    elif dlspeed:
+        line += f" ⬇ {dlspeed // 1024} KB/s"
+    eta = torrent.get('eta', _INFINITE_ETA)
+    if progress < 1 and 0 < eta < _INFINITE_ETA:
+        line += f" ⏱ {eta // 3600}h{eta % 3600 // 60:02d}m"
+    return line
+
+
+def get_qbittorrent_downloads(
+    status_filter: str = 'all',
+    sort: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+) -> tuple[str | None, str | None, int]:
+    """Renders one page of downloads, applying torrents_info-style filter/sort/paging to the local mirror.
+
+    Returns (message, error, total matching torrents).
+    """
+    if not QBITTORRENT_URL:
+        logger.error("QBITTORRENT_URL not configured.")
+        return None, "qBittorrent URL not configured.", 0
+
+    try:
+        stale_note = ''
+        try:
+            torrents = _sync_torrents()
+        except (CircuitOpen, qbittorrentapi.APIConnectionError) as e:
+            # While qBittorrent is unreachable, keep showing the last list it sent, marked as stale
+            if isinstance(e, (qbittorrentapi.HTTP4XXError, qbittorrentapi.LoginFailed)) or _synced_at is None:
+                raise
+            logger.warning(f"qBittorrent unreachable ({e}). Serving the last synced torrent list.")
+            with _sync_lock:
+                torrents = list(_torrents.values())
+            stale_note = f"⚠️ <i>qBittorrent is unreachable. Showing data from {time.strftime('%H:%M:%S', time.localtime(_synced_at))}.</i>\n"
+        if not torrents:
+            return "No active downloads found.", None, 0
+
+        states = STATUS_FILTERS.get(status_filter)
+        if states is not None:
+            torrents = [t for t in torrents if t.get('state') in states]
+        if sort in SORT_KEYS:
+            torrents.sort(key=lambda t: t.get(sort, 0), reverse=SORT_KEYS[sort])
+
+        total = len(torrents)
+        if not total:
+            return "No torrents match this filter.", None, 0
+
+        page = torrents[offset:offset + limit] if limit else torrents[offset:]
+        message_lines = [f"{stale_note}<b>Current Downloads:</b>\n"]
+        message_lines.extend(_format_torrent_line(torrent) for torrent in page)
+
+        return "\n".join(message_lines), None, total
+
+    except CircuitOpen:
+        logger.warning("Skipped qBittorrent request: circuit open.")
+        return None, "qBittorrent is unreachable right now. Please try again later.", 0
     except qbittorrentapi.LoginFailed:
         logger.exception(f"qBittorrent login failed for user '{QBITTORRENT_USERNAME}'. Check credentials.")
-        return None, "qBittorrent login failed. Check credentials."
+        return None, "qBittorrent login failed. Check credentials.", 0
     except qbittorrentapi.APIConnectionError as e:
         logger.exception(f"Could not connect to qBittorrent at {QBITTORRENT_URL}")
-        return None, f"Could not connect to qBittorrent: {e}"
+        return None, f"Could not connect to qBittorrent: {e}", 0
     except qbittorrentapi.exceptions.NotFound404Error:
         logger.exception("qBittorrent API endpoint not found (wrong URL or version mismatch).")
-        return None, "qBittorrent API endpoint not found. Check URL/version."
+        return None, "qBittorrent API endpoint not found. Check URL/version.", 0
     except requests.exceptions.RequestException as e:
         logger.exception(f"Network error communicating with qBittorrent at {QBITTORRENT_URL}")
-        return None, f"Network error connecting to qBittorrent: {e}"
+        return None, f"Network error connecting to qBittorrent: {e}", 0
     except Exception as e:
         logger.exception("An unexpected error occurred while fetching qBittorrent downloads")
-        return None, f"An unexpected error occurred: {e}"
-    finally:
-        try:
-            if client.is_logged_in:
-                client.auth_log_out()
-                logger.info("Logged out from qBittorrent.")
-        except Exception as e:
-            logger.warning(f"Failed to log out from qBittorrent: {e}")
+        return None, f"An unexpected error occurred: {e}", 0
@@ -1,37 +1,64 @@
+import asyncio
 import logging
-import requests
+import httpx
 import json
 from config import (
+    ArrInstance,
     RADARR_URL,
     RADARR_API_KEY,
-    RADARR_ROOT_FOLDER_ID,
-    RADARR_QUALITY_PROFILE_ID,
-    DEFAULT_TIMEOUT,
+    SEARCH_RESULT_LIMIT,
+    default_instances,
 )
-from utils import make_api_request, http_session
+from utils import make_api_request, send_request
+from circuit_breaker import CircuitOpen
+from concurrency import UpstreamBusy
+from search_cache import search_cache
+from models import LOOKUP_FIELDS, SearchResult
+from library_index import radarr_library
+from arr_metadata import INSTANCE_CATALOGS
 
 logger = logging.getLogger(__name__)
 
 
-def search_radarr(query: str) -> list:
-    """Searches Radarr for a movie."""
+async def search_radarr(query: str) -> list[SearchResult] | None:
+    """Searches Radarr for a movie, serving repeated queries from the shared search cache.
+
+    Returns None if Radarr could not be reached and nothing was cached for the query.
+    """
     if not RADARR_URL or not RADARR_API_KEY:
         logger.error("Radarr URL or API Key not configured.")
         return []
-    result = make_api_request(RADARR_URL, RADARR_API_KEY, 'movie/lookup', {'term': query})
-    return result if isinstance(result, list) else []
 
+    async def lookup() -> list[SearchResult] | None:
+        result = await make_api_request(
+            'radarr', RADARR_URL, RADARR_API_KEY, 'movie/lookup', {'term': query}, limit=SEARCH_RESULT_LIMIT, fields=LOOKUP_FIELDS
+        )
+        if not isinstance(result, list):
+            return None
+        items = [item for item in result if isinstance(item, dict)]
+        for item in items:
+            # Radarr sets 'id' on lookup items that are already in the library
+            if item.get('id'):
+                radarr_library.add(item.get('tmdbId'))
+        return [SearchResult.from_lookup('movie', item) for item in items]
 
-def add_movie_to_radarr(movie_info: dict) -> bool | str:
-    """Adds a movie to Radarr."""
-    if not RADARR_URL or not RADARR_API_KEY:
-        logger.error("Radarr URL or API Key not configured.")
+    return await search_cache.get_or_fetch('radarr', query, lookup)
+
+
+async def _add_movie_to_instance(movie: SearchResult, instance: ArrInstance) -> bool | str:
+    """Adds a movie to one Radarr instance."""
+    if not instance.url or not instance.api_key:
+        logger.error(f"{instance.name} URL or API Key not configured.")
         return False
+    # Only the primary's library is indexed; the others report duplicates through their validator
+    if instance.is_primary and movie.external_id in radarr_library:
+        logger.info(f"'{movie.title}' is already in the {instance.name} library. Skipping add.")
+        return 'MovieExistsValidator'
 
     payload = {
-        "title": movie_info.get('title'),
-        "tmdbId": movie_info.get('tmdbId'),
-        "qualityProfileId": RADARR_QUALITY_PROFILE_ID,
+        "title": movie.title,
+        "tmdbId": movie.external_id,
+        "qualityProfileId": instance.quality_profile_id,
         "rootFolderPath": "/data/movies",
         "monitored": True,
         "addOptions": {
@@ -39,32 +66,32 @@ def add_movie_to_radarr(movie_info: dict) -> bool | str:
         }
     }
 
-    # Get the correct root folder path using the configured ID
-    root_folders = make_api_request(RADARR_URL, RADARR_API_KEY, 'rootfolder')
-    if isinstance(root_folders, list) and root_folders:
-        target_folder = next((rf['path'] for rf in root_folders if rf.get('id') == RADARR_ROOT_FOLDER_ID), None)
-        if target_folder:
-            payload['rootFolderPath'] = target_folder
-        else:
-            logger.error(f"Radarr Root Folder ID {RADARR_ROOT_FOLDER_ID} not found in Radarr API response.")
-            return False
-    else:
-        logger.error("Could not retrieve Radarr root folders via API.")
+    # Resolve the configured root folder ID from the cached metadata catalog
+    catalog = INSTANCE_CATALOGS[instance.upstream]
+    target_folder = await catalog.get_root_folder_path()
+    if not target_folder:
+        logger.error(f"{instance.name} Root Folder ID {instance.root_folder_id} not found in {instance.name} metadata.")
         return False
+    payload['rootFolderPath'] = target_folder
 
-    headers = {'X-Api-Key': RADARR_API_KEY, 'Content-Type': 'application/json'}
-    url = f"{RADARR_URL}/api/v3/movie"
-    response = None
+    headers = {'X-Api-Key': instance.api_key}
+    url = f"{instance.url}/api/v3/movie"
     try:
-        response = http_session.post(url, headers=headers, json=payload, timeout=DEFAULT_TIMEOUT)
-        response.raise_for_status()
-        logger.info(f"Movie '{movie_info.get('title')}' added successfully to Radarr.")
+        # Never retried: a lost response could mean the add went through
+        await send_request(instance.upstream, 'POST', url, headers=headers, json=payload, retry=False, endpoint='add')
+        logger.info(f"Movie '{movie.title}' added successfully to {instance.name}.")
+        if instance.is_primary:
+            radarr_library.add(movie.external_id)
         return True
-    except requests.exceptions.RequestException as e:
-        log_message = f"Failed to add movie '{movie_info.get('title')}' to Radarr."
+    except CircuitOpen:
+        logger.warning(f"Not adding '{movie.title}': {instance.name} is unreachable (circuit open).")
+        return 'ServiceUnavailable'
+    except httpx.HTTPError as e:
+        response = e.response if isinstance(e, httpx.HTTPStatusError) else None
+        log_message = f"Failed to add movie '{movie.title}' to {instance.name}."
         error_code = 'unknown_error'
         if response is not None:
-            log_message += f" Radarr response: {response.text}"
+            log_message += f" {instance.name} response: {response.text}"
             try:
                 error_response = response.json()
                 if isinstance(error_response, list) and error_response:
@@ -72,9 +99,34 @@ def add_movie_to_radarr(movie_info: dict) -> bool | str:
                     if isinstance(first_error, dict) and 'errorCode' in first_error:
                         error_code = first_error['errorCode']
             except json.JSONDecodeError:
-                logger.warning("Failed to decode Radarr error response JSON.")
+                logger.warning(f"Failed to decode {instance.name} error response JSON.")
             except Exception as json_e:
-                logger.warning(f"Unexpected error parsing Radarr error response: {json_e}")
+                logger.warning(f"Unexpected error parsing {instance.name} error response: {json_e}")
 
         logger.exception(log_message)
+        if error_code == 'MovieExistsValidator':
+            if instance.is_primary:
+                radarr_library.add(movie.external_id)
+        elif response is not None and response.status_code == 400:
+            # A validation error may mean root folders or profiles changed in Radarr
+            catalog.invalidate()
         return error_code
+
+
+async def add_movie_to_radarr(
+    movie: SearchResult, instances: list[ArrInstance] | None = None
+) -> list[tuple[ArrInstance, bool | str]]:
+    """Adds a movie to every given Radarr instance at once (the default ones if none are given).
+
+    Returns each instance with its outcome, in the order given. An instance that is saturated reports
+    'UpstreamBusy' instead of failing the others.
+    """
+    instances = instances or default_instances('movie')
+
+    async def add_to(instance: ArrInstance) -> tuple[ArrInstance, bool | str]:
+        try:
+            return instance, await _add_movie_to_instance(movie, instance)
+        except UpstreamBusy:
+            return instance, 'UpstreamBusy'
+
+    return list(await asyncio.gather(*(add_to(instance) for instance in instances)))
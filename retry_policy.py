@@ -0,0 +1,36 @@
+import random
+import time
+
+from config import RETRY_MAX_ATTEMPTS, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX, RETRY_DEADLINE
+
+# Statuses a reverse proxy or a restarting service returns briefly; anything else is not worth retrying
+RETRY_STATUSES = frozenset({502, 503, 504})
+# Only requests that are safe to repeat are ever retried
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD'})
+
+
+class RetryBudget:
+    """Attempt counter and overall deadline for one retried call, with capped, fully jittered exponential backoff."""
+
+    def __init__(self, max_attempts: int = RETRY_MAX_ATTEMPTS, deadline: float = RETRY_DEADLINE):
+        self.max_attempts = max_attempts
+        self.attempt = 0
+        self._deadline = time.monotonic() + deadline
+
+    @property
+    def remaining(self) -> float:
+        """Seconds left before the deadline."""
+        return max(0.0, self._deadline - time.monotonic())
+
+    def start_attempt(self) -> int:
+        self.attempt += 1
+        return self.attempt
+
+    def next_delay(self) -> float | None:
+        """Returns how long to wait before the next attempt, or None if attempts or time are used up."""
+        if self.attempt >= self.max_attempts:
+            return None
+        delay = random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** (self.attempt - 1)))
+        if delay >= self.remaining:
+            return None
+        return delay
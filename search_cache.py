@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from config import SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+
+class SearchCache:
+    """Bounded LRU cache of lookup results with a TTL that coalesces identical in-flight lookups."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, str], tuple[float, list]] = OrderedDict()
+        self._inflight: dict[tuple[str, str], asyncio.Task] = {}
+        self._waiters: dict[tuple[str, str], int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_served = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Folds case and whitespace so 'Dune ', 'dune' and 'DUNE' share one entry."""
+        return ' '.join(query.casefold().split())
+
+    async def get_or_fetch(
+        self, service: str, query: str, fetch: Callable[[], Awaitable[list | None]]
+    ) -> list | None:
+        """Returns cached results for (service, query), or runs fetch once for all concurrent callers.
+
+        A None result from fetch means the lookup failed and is not cached; the expired entry for the
+        query is served instead if there is one (see is_stale).
+        """
+        key = (service, self.normalize(query))
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch_and_store(key, fetch))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+            logger.debug(f"Joining in-flight {service} lookup for '{key[1]}'.")
+        # Shield so one cancelled caller does not cancel the lookup the others are waiting on
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # The last caller gave up (e.g. a superseded inline query), so nobody needs the lookup any more
+            if self._waiters[key] == 1 and not task.done():
+                logger.debug(f"Cancelling abandoned {service} lookup for '{key[1]}'.")
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def peek(self, service: str, query: str, min_prefix: int | None = None) -> tuple[str, list] | None:
+        """Returns (cached query, results) for a fresh entry without fetching or counting a lookup.
+
+        With min_prefix, falls back to the longest fresh cached query of at least min_prefix characters that
+        the query extends, e.g. 'dun' while typing 'dune'. Its results are the caller's to filter.
+        """
+        needle = self.normalize(query)
+        now = time.monotonic()
+        entry = self._entries.get((service, needle))
+        if entry and entry[0] > now:
+            return needle, entry[1]
+        if min_prefix is None:
+            return None
+        best = None
+        for (entry_service, cached_query), (expires_at, results) in self._entries.items():
+            if (
+                entry_service == service and expires_at > now and len(cached_query) >= min_prefix
+                and needle.startswith(cached_query) and (best is None or len(cached_query) > len(best[0]))
+            ):
+                best = (cached_query, results)
+        return best
+
+    async def _fetch_and_store(self, key: tuple[str, str], fetch: Callable[[], Awaitable[list | None]]) -> list | None:
+        try:
+            result = await fetch()
+            if result is not None:
+                self._entries[key] = (time.monotonic() + self.ttl, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            elif key in self._entries:
+                self.stale_served += 1
+                logger.warning(f"{key[0]} lookup for '{key[1]}' failed. Serving stale cached results.")
+                return self._entries[key][1]
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def is_stale(self, service: str, query: str) -> bool:
+        """True if the cached entry for (service, query) has expired, i.e. it was served as a fallback."""
+        entry = self._entries.get((service, self.normalize(query)))
+        return entry is not None and entry[0] <= time.monotonic()
+
+    def stats(self) -> dict[str, int | float]:
+        """Returns hit/miss counters and the current size."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'stale_served': self.stale_served,
+            'size': len(self._entries),
+            'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+search_cache = SearchCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
@@ -1,39 +1,67 @@
+import asyncio
 import logging
-import requests
+import httpx
 import json
 from config import (
+    ArrInstance,
     SONARR_URL,
     SONARR_API_KEY,
-    SONARR_ROOT_FOLDER_ID,
-    SONARR_QUALITY_PROFILE_ID,
-    DEFAULT_TIMEOUT,
+    SEARCH_RESULT_LIMIT,
+    default_instances,
 )
-from utils import make_api_request, http_session
+from utils import make_api_request, send_request
+from circuit_breaker import CircuitOpen
+from concurrency import UpstreamBusy
+from search_cache import search_cache
+from models import LOOKUP_FIELDS, SearchResult
+from library_index import sonarr_library
+from arr_metadata import INSTANCE_CATALOGS
 
 logger = logging.getLogger(__name__)
 
 
-def search_sonarr(query: str) -> list:
-    """Searches Sonarr for a series."""
+async def search_sonarr(query: str) -> list[SearchResult] | None:
+    """Searches Sonarr for a series, serving repeated queries from the shared search cache.
+
+    Returns None if Sonarr could not be reached and nothing was cached for the query.
+    """
     if not SONARR_URL or not SONARR_API_KEY:
         logger.error("Sonarr URL or API Key not configured.")
         return []
-    result = make_api_request(SONARR_URL, SONARR_API_KEY, 'series/lookup', {'term': query})
-    return result if isinstance(result, list) else []
 
+    async def lookup() -> list[SearchResult] | None:
+        result = await make_api_request(
+            'sonarr', SONARR_URL, SONARR_API_KEY, 'series/lookup', {'term': query}, limit=SEARCH_RESULT_LIMIT, fields=LOOKUP_FIELDS
+        )
+        if not isinstance(result, list):
+            return None
+        items = [item for item in result if isinstance(item, dict)]
+        for item in items:
+            # Sonarr sets 'id' on lookup items that are already in the library
+            if item.get('id'):
+                sonarr_library.add(item.get('tvdbId'))
+        return [SearchResult.from_lookup('series', item) for item in items]
 
-def add_series_to_sonarr(series_info: dict) -> bool | str:
-    """Adds a series to Sonarr."""
-    if not SONARR_URL or not SONARR_API_KEY:
-        logger.error("Sonarr URL or API Key not configured.")
+    return await search_cache.get_or_fetch('sonarr', query, lookup)
+
+
+async def _add_series_to_instance(series: SearchResult, instance: ArrInstance) -> bool | str:
+    """Adds a series to one Sonarr instance."""
+    if not instance.url or not instance.api_key:
+        logger.error(f"{instance.name} URL or API Key not configured.")
         return False
+    # Only the primary's library is indexed; the others report duplicates through their validator
+    if instance.is_primary and series.external_id in sonarr_library:
+        logger.info(f"'{series.title}' is already in the {instance.name} library. Skipping add.")
+        return 'SeriesExistsValidator'
 
     payload = {
-        "title": series_info.get('title'),
-        "tvdbId": series_info.get('tvdbId'),
-        "qualityProfileId": SONARR_QUALITY_PROFILE_ID,
+        "title": series.title,
+        "tvdbId": series.external_id,
+        "qualityProfileId": instance.quality_profile_id,
         "rootFolderPath": "/data/tv",
-        "seasons": series_info.get('seasons', []),
+        # Seasons kept from the search; Sonarr fills them in itself when there are none
+        "seasons": [{"seasonNumber": number, "monitored": monitored} for number, monitored in series.seasons],
         "monitored": True,
         "monitor": "all",
         "addOptions": {
@@ -41,32 +69,32 @@ def add_series_to_sonarr(series_info: dict) -> bool | str:
         }
     }
 
-    # Get the correct root folder path using the configured ID
-    root_folders = make_api_request(SONARR_URL, SONARR_API_KEY, 'rootfolder')
-    if isinstance(root_folders, list) and root_folders:
-        target_folder = next((rf['path'] for rf in root_folders if rf.get('id') == SONARR_ROOT_FOLDER_ID), None)
-        if target_folder:
-            payload['rootFolderPath'] = target_folder
-        else:
-            logger.error(f"Sonarr Root Folder ID {SONARR_ROOT_FOLDER_ID} not found in Sonarr API response.")
-            return False
-    else:
-        logger.error("Could not retrieve Sonarr root folders via API.")
+    # Resolve the configured root folder ID from the cached metadata catalog
+    catalog = INSTANCE_CATALOGS[instance.upstream]
+    target_folder = await catalog.get_root_folder_path()
+    if not target_folder:
+        logger.error(f"{instance.name} Root Folder ID {instance.root_folder_id} not found in {instance.name} metadata.")
         return False
+    payload['rootFolderPath'] = target_folder
 
-    headers = {'X-Api-Key': SONARR_API_KEY, 'Content-Type': 'application/json'}
-    url = f"{SONARR_URL}/api/v3/series"
-    response = None
+    headers = {'X-Api-Key': instance.api_key}
+    url = f"{instance.url}/api/v3/series"
     try:
-        response = http_session.post(url, headers=headers, json=payload, timeout=DEFAULT_TIMEOUT)
-        response.raise_for_status()
-        logger.info(f"Series '{series_info.get('title')}' added successfully to Sonarr.")
+        # Never retried: a lost response could mean the add went through
+        await send_request(instance.upstream, 'POST', url, headers=headers, json=payload, retry=False, endpoint='add')
+        logger.info(f"Series '{series.title}' added successfully to {instance.name}.")
+        if instance.is_primary:
+            sonarr_library.add(series.external_id)
         return True
-    except requests.exceptions.RequestException as e:
-        log_message = f"Failed to add series '{series_info.get('title')}' to Sonarr."
+    except CircuitOpen:
+        logger.warning(f"Not adding '{series.title}': {instance.name} is unreachable (circuit open).")
+        return 'ServiceUnavailable'
+    except httpx.HTTPError as e:
+        response = e.response if isinstance(e, httpx.HTTPStatusError) else None
+        log_message = f"Failed to add series '{series.title}' to {instance.name}."
         error_code = 'unknown_error'
         if response is not None:
-            log_message += f" Sonarr response: {response.text}"
+            log_message += f" {instance.name} response: {response.text}"
             try:
                 error_response = response.json()
                 if isinstance(error_response, list) and error_response:
@@ -74,9 +102,34 @@ def add_series_to_sonarr(series_info: dict) -> bool | str:
                     if isinstance(first_error, dict) and 'errorCode' in first_error:
                         error_code = first_error['errorCode']
             except json.JSONDecodeError:
-                logger.warning("Failed to decode Sonarr error response JSON.")
+                logger.warning(f"Failed to decode {instance.name} error response JSON.")
             except Exception as json_e:
-                logger.warning(f"Unexpected error parsing Sonarr error response: {json_e}")
+                logger.warning(f"Unexpected error parsing {instance.name} error response: {json_e}")
 
         logger.exception(log_message)
+        if error_code == 'SeriesExistsValidator':
+            if instance.is_primary:
+                sonarr_library.add(series.external_id)
+        elif response is not None and response.status_code == 400:
+            # A validation error may mean root folders or profiles changed in Sonarr
+            catalog.invalidate()
         return error_code
+
+
+async def add_series_to_sonarr(
+    series: SearchResult, instances: list[ArrInstance] | None = None
+) -> list[tuple[ArrInstance, bool | str]]:
+    """Adds a series to every given Sonarr instance at once (the default ones if none are given).
+
+    Returns each instance with its outcome, in the order given. An instance that is saturated reports
+    'UpstreamBusy' instead of failing the others.
+    """
+    instances = instances or default_instances('series')
+
+    async def add_to(instance: ArrInstance) -> tuple[ArrInstance, bool | str]:
+        try:
+            return instance, await _add_series_to_instance(series, instance)
+        except UpstreamBusy:
+            return instance, 'UpstreamBusy'
+
+    return list(await asyncio.gather(*(add_to(instance) for instance in instances)))
@@ -0,0 +1,55 @@
+import logging
+import httpx
+from config import SPOTIFY_API_URL
+from utils import send_request
+from concurrency import UpstreamBusy
+from circuit_breaker import CircuitOpen
+
+logger = logging.getLogger(__name__)
+
+
+async def add_spotify_playlist(query_text: str) -> tuple[dict | None, str | None]:
+    """Looks up a Spotify playlist URL on the Spotify service and enables periodic sync for it."""
+    if not SPOTIFY_API_URL:
+        return None, "Spotify service URL (SPOTIFY_API_URL) is not configured."
+
+    api_endpoint = f"{SPOTIFY_API_URL.rstrip('/')}/api/saved-items"
+    try:
+        payload1 = {"search": query_text}
+        res1 = await send_request('spotify', 'POST', api_endpoint, json=payload1, endpoint='saved-items')
+        data = res1.json()
+
+        playlist = None
+        if isinstance(data, list):
+            for item in data:
+                if isinstance(item, dict) and item.get("type") == "spotify-playlist":
+                    playlist = item
+                    break
+
+        if not playlist:
+            return None, "Could not find a valid Spotify playlist from that URL."
+
+        playlist_id = playlist.get("id")
+        if not playlist_id:
+            return None, "Playlist ID not found in the response."
+
+        payload2 = {"ids": [playlist_id], "sync": True, "sync_interval": "10", "label": ""}
+        await send_request('spotify', 'PUT', api_endpoint, json=payload2, endpoint='saved-items')
+
+        return playlist, None
+    except UpstreamBusy:
+        return None, "The Spotify service is busy right now. Please try again in a moment."
+    except CircuitOpen:
+        return None, "The Spotify service is unreachable right now. Please try again later."
+    except httpx.ConnectError:
+        logger.exception(f"Connection refused to Spotify service at {SPOTIFY_API_URL}")
+        return None, f"Could not connect to Spotify service at {SPOTIFY_API_URL}. Check that the service is running and reachable."
+    except httpx.TimeoutException:
+        logger.exception(f"Timeout connecting to Spotify service at {SPOTIFY_API_URL}")
+        return None, f"Timeout connecting to Spotify service at {SPOTIFY_API_URL}."
+    except httpx.HTTPError as e:
+        logger.exception("Network error while adding Spotify playlist")
+        return None, f"Network error: {e}"
+    except Exception as e:
+        logger.exception("Unexpected error while adding Spotify playlist")
+        return None, f"Unexpected error: {e}"
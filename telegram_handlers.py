@@ -1,25 +1,89 @@
 import logging
 import html
 import asyncio
-import requests
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import CallbackContext, ConversationHandler
-
-from config import DEFAULT_TIMEOUT, SPOTIFY_API_URL
-from utils import restricted, http_session
+import time
+from collections import OrderedDict
+from telegram import (
+    Update,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    Message,
+)
+from telegram.error import BadRequest, RetryAfter
+from telegram.ext import CallbackContext, ConversationHandler, Job
+
+from config import (
+    ARR_INSTANCES,
+    ArrInstance,
+    default_instances,
+    SPOTIFY_API_URL,
+    SEARCH_RESULT_LIMIT,
+    INLINE_DEBOUNCE,
+    INLINE_MIN_QUERY_LENGTH,
+    STATS_WINDOW,
+    NOTIFY_PORT,
+    BULK_ADD_CONCURRENCY,
+    DOWNLOADS_PAGE_SIZE,
+    DOWNLOADS_LIVE_INTERVAL,
+    DOWNLOADS_LIVE_DURATION,
+)
+from utils import admin_only, restricted
+from concurrency import UpstreamBusy, run_blocking
 from sonarr_client import search_sonarr, add_series_to_sonarr
 from radarr_client import search_radarr, add_movie_to_radarr
 from qb_client import get_qbittorrent_downloads
+from spotify_client import add_spotify_playlist
+from models import SearchResult
+from search_cache import SearchCache, search_cache
+from library_index import in_library
+from file_id_cache import file_id_cache
+from download_notifier import requester_registry
+from circuit_breaker import breaker_stats
+from metrics import STARTED_AT, count_active_conversations, latency_summary, process_rss
+from profiler import handler_profiler
 
 logger = logging.getLogger(__name__)
 
 # Conversation states
 SEARCH_TYPE, SEARCH_QUERY, CHOOSE_ITEM, CONFIRM_ADD = range(4)
 
+# Pasted title lists are cut to this many lines
+MAX_PASTED_TITLES = 25
+
+# Display names for the upstream keys carried by UpstreamBusy, including every Radarr/Sonarr instance
+_UPSTREAM_NAMES = {
+    'radarr': 'Radarr', 'sonarr': 'Sonarr', 'spotify': 'Spotify', 'qbittorrent': 'qBittorrent',
+    **{instance.upstream: instance.name for instances in ARR_INSTANCES.values() for instance in instances},
+}
+# Radarr/Sonarr error codes meaning the item was already there
+_EXISTS_CODES = ('SeriesExistsValidator', 'MovieExistsValidator')
+
+
+def _stale_notice(service_names: list[str]) -> str:
+    """Marker appended to search results served from the cache because their service could not be reached."""
+    verb = 'are' if len(service_names) > 1 else 'is'
+    return f"⚠️ {' and '.join(service_names)} {verb} unreachable. Showing cached results, which may be out of date."
+
+
+def _missing_notice(service_names: list[str]) -> str:
+    """Marker appended to combined search results when some services could not be searched."""
+    verb = 'were' if len(service_names) > 1 else 'was'
+    return f"⚠️ {' and '.join(service_names)} {verb} busy or unreachable, so these results are incomplete."
+
+
+def _busy_text(error: UpstreamBusy) -> str:
+    """Reply shown when an upstream is saturated and the request was rejected instead of queued."""
+    return f"⏳ {_UPSTREAM_NAMES.get(error.upstream, error.upstream)} is busy right now. Please try again in a moment."
+
 
 def _clear_user_data(context: CallbackContext) -> None:
     """Safely cleans up all conversation-related keys from context.user_data."""
-    for key in ['search_type', 'search_results', 'chosen_item', '_state_name']:
+    for key in [
+        'search_type', 'search_results', 'search_order', 'search_notice', 'search_selected', 'chosen_item', 'add_targets',
+        '_state_name',
+    ]:
         context.user_data.pop(key, None)
 
 
@@ -28,6 +92,7 @@ def _build_main_menu_keyboard() -> InlineKeyboardMarkup:
     keyboard = [
         [InlineKeyboardButton("🎬 Movie", callback_data='movie')],
         [InlineKeyboardButton("📺 Series", callback_data='series')],
+        [InlineKeyboardButton("🔎 Anything", callback_data='anything')],
     ]
     if SPOTIFY_API_URL:
         keyboard.append([InlineKeyboardButton("🎵 Spotify Playlist", callback_data='spotify')])
@@ -71,6 +136,22 @@ async def _restart_conversation(update: Update, context: CallbackContext) -> int
     return ConversationHandler.END
 
 
+async def _send_photo_cached(context: CallbackContext, chat_id: int, photo_url: str, **kwargs) -> Message:
+    """Sends a photo by URL, reusing the file_id Telegram returned the first time that URL was sent."""
+    file_id = file_id_cache.get(photo_url)
+    if file_id:
+        try:
+            return await context.bot.send_photo(chat_id=chat_id, photo=file_id, **kwargs)
+        except BadRequest as e:
+            logger.warning(f"Cached file_id for {photo_url} was rejected ({e}). Re-uploading from URL.")
+            file_id_cache.discard(photo_url)
+
+    message = await context.bot.send_photo(chat_id=chat_id, photo=photo_url, **kwargs)
+    if message.photo:
+        file_id_cache.put(photo_url, message.photo[-1].file_id)
+    return message
+
+
 @restricted
 async def start(update: Update, context: CallbackContext) -> int:
     """Sends welcome message and displays search options."""
@@ -98,67 +179,315 @@ async def help_command(update: Update, context: CallbackContext) -> None:
             "🤖 <b>Bot Commands:</b>\n\n"
             f"• /start - Start a new search for {media_types}\n"
             "• /downloads - Check active qBittorrent downloads\n"
+            "• /downloads live - Keep the downloads message updating for a few minutes\n"
             "• /help - Show this help message\n"
             "• /cancel - Cancel the current action",
             parse_mode='HTML'
         )
 
 
+# /downloads view controls: (callback value, button label)
+_DOWNLOAD_FILTER_BUTTONS = [
+    ('all', "All"),
+    ('downloading', "⬇️"),
+    ('seeding', "⬆️"),
+    ('stalled', "⏸"),
+    ('completed', "✅"),
+]
+_DOWNLOAD_SORT_BUTTONS = [
+    ('progress', "📊 Progress"),
+    ('dlspeed', "⚡ Speed"),
+    ('eta', "⏱ ETA"),
+]
+
+
+def _build_downloads_keyboard(status_filter: str, sort: str, page: int, total_pages: int) -> InlineKeyboardMarkup:
+    """Builds the filter, sort and page navigation keyboard for a /downloads page."""
+    def view(new_filter: str = status_filter, new_sort: str = sort, new_page: int = 0) -> str:
+        return f'dl:{new_filter}:{new_sort}:{new_page}'
+
+    filter_row = [
+        InlineKeyboardButton(f"• {label}" if value == status_filter else label, callback_data=view(new_filter=value))
+        for value, label in _DOWNLOAD_FILTER_BUTTONS
+    ]
+    sort_row = [
+        InlineKeyboardButton(f"• {label}" if value == sort else label, callback_data=view(new_sort=value))
+        for value, label in _DOWNLOAD_SORT_BUTTONS
+    ]
+    nav_row = []
+    if page > 0:
+        nav_row.append(InlineKeyboardButton("◀️ Prev", callback_data=view(new_page=page - 1)))
+    nav_row.append(InlineKeyboardButton(f"🔄 {page + 1}/{total_pages}", callback_data=view(new_page=page)))
+    if page + 1 < total_pages:
+        nav_row.append(InlineKeyboardButton("Next ▶️", callback_data=view(new_page=page + 1)))
+
+    return InlineKeyboardMarkup([
+        filter_row,
+        sort_row,
+        nav_row,
+        [InlineKeyboardButton("⬅️ Back", callback_data='back_to_start')],
+    ])
+
+
+async def _render_downloads_page(status_filter: str, sort: str, page: int) -> tuple[str, InlineKeyboardMarkup]:
+    """Fetches one /downloads page from qBittorrent and builds its text and keyboard. Raises UpstreamBusy."""
+    # Run blocking qBittorrent I/O on its dedicated worker threads to avoid freezing the event loop
+    message, error, total = await run_blocking(
+        'qbittorrent',
+        get_qbittorrent_downloads,
+        status_filter,
+        None if sort == 'none' else sort,
+        DOWNLOADS_PAGE_SIZE,
+        page * DOWNLOADS_PAGE_SIZE,
+    )
+    total_pages = max(1, -(-total // DOWNLOADS_PAGE_SIZE))
+    if page >= total_pages:
+        return await _render_downloads_page(status_filter, sort, total_pages - 1)
+
+    reply_markup = _build_downloads_keyboard(status_filter, sort, page, total_pages)
+    if error:
+        return f"❌ Error: {html.escape(error)}", reply_markup
+    if not message:
+        return "Could not retrieve download status or no active downloads.", reply_markup
+    if total:
+        message += f"\n\n<i>{total} torrents · page {page + 1}/{total_pages}</i>"
+    return message, reply_markup
+
+
+def _live_downloads_footer(final: bool) -> str:
+    """Footer appended to a live /downloads message."""
+    if final:
+        return "\n⏹ <i>Live updates ended.</i>"
+    return f"\n🔴 <i>Live · refreshing every {DOWNLOADS_LIVE_INTERVAL}s</i>"
+
+
+def _find_live_downloads_job(context: CallbackContext, chat_id: int, message_id: int | None = None) -> Job | None:
+    """Returns the live /downloads job of a chat, optionally only if it drives the given message."""
+    if not context.job_queue:
+        return None
+    for job in context.job_queue.get_jobs_by_name(f'downloads_live_{chat_id}'):
+        if message_id is None or job.data['message_id'] == message_id:
+            return job
+    return None
+
+
+async def _live_downloads_tick(context: CallbackContext) -> None:
+    """Job callback that re-renders a live /downloads message, editing it only when the text changed."""
+    job = context.job
+    data = job.data
+    now = time.monotonic()
+    if now < data['resume_at']:
+        return
+
+    final = now + DOWNLOADS_LIVE_INTERVAL >= data['ends_at']
+    try:
+        message, reply_markup = await _render_downloads_page(*data['view'])
+    except UpstreamBusy:
+        # Keep showing the last snapshot; the next tick tries again
+        return
+    message += _live_downloads_footer(final)
+
+    if message != data['last_text']:
+        try:
+            await context.bot.edit_message_text(
+                chat_id=job.chat_id,
+                message_id=data['message_id'],
+                text=message,
+                parse_mode='HTML',
+                reply_markup=reply_markup
+            )
+            data['last_text'] = message
+        except RetryAfter as e:
+            logger.warning(f"Flood control on live downloads for chat {job.chat_id}. Pausing {e.retry_after}s.")
+            data['resume_at'] = now + e.retry_after
+            return
+        except BadRequest as e:
+            if 'not modified' not in str(e).lower():
+                logger.warning(f"Stopping live downloads for chat {job.chat_id}: {e}")
+                job.schedule_removal()
+                return
+
+    if final:
+        job.schedule_removal()
+
+
+def _start_live_downloads(context: CallbackContext, chat_id: int, message_id: int, text: str) -> None:
+    """Schedules periodic edits of a /downloads message, replacing any live message already running in the chat."""
+    previous = _find_live_downloads_job(context, chat_id)
+    if previous:
+        previous.schedule_removal()
+
+    context.job_queue.run_repeating(
+        _live_downloads_tick,
+        interval=DOWNLOADS_LIVE_INTERVAL,
+        first=DOWNLOADS_LIVE_INTERVAL,
+        last=DOWNLOADS_LIVE_DURATION + DOWNLOADS_LIVE_INTERVAL,
+        data={
+            'message_id': message_id,
+            'view': ('all', 'none', 0),
+            'last_text': text,
+            'resume_at': 0.0,
+            'ends_at': time.monotonic() + DOWNLOADS_LIVE_DURATION,
+        },
+        name=f'downloads_live_{chat_id}',
+        chat_id=chat_id,
+    )
+    logger.info(f"Started live downloads for chat {chat_id} ({DOWNLOADS_LIVE_DURATION}s).")
+
+
 @restricted
 async def downloads_command(update: Update, context: CallbackContext) -> None:
-    """Handles the /downloads command non-blockingly with safe message splitting."""
+    """Handles /downloads by editing a single status message with the first page; '/downloads live' keeps it updated."""
     if not update.message:
         return
 
-    await update.message.reply_text("⏳ Fetching download status from qBittorrent...")
+    live = bool(context.args) and context.args[0].lower() == 'live' and context.job_queue is not None
+
+    status_message = await update.message.reply_text("⏳ Fetching download status from qBittorrent...")
+    try:
+        message, reply_markup = await _render_downloads_page('all', 'none', 0)
+    except UpstreamBusy as e:
+        await status_message.edit_text(_busy_text(e))
+        return
+    if live:
+        message += _live_downloads_footer(final=False)
+    try:
+        await status_message.edit_text(message, parse_mode='HTML', reply_markup=reply_markup)
+    except Exception:
+        logger.exception("Failed to send formatted HTML download message. Falling back to plain text.")
+        await status_message.edit_text(message, reply_markup=reply_markup)
 
-    # Run blocking qBittorrent I/O in a separate thread to avoid freezing the event loop
-    message, error = await asyncio.to_thread(get_qbittorrent_downloads)
+    if live:
+        _start_live_downloads(context, status_message.chat_id, status_message.message_id, message)
 
-    keyboard = [[InlineKeyboardButton("⬅️ Back", callback_data='back_to_start')]]
-    reply_markup = InlineKeyboardMarkup(keyboard)
 
-    if error:
-        await update.message.reply_text(f"❌ Error: {error}", reply_markup=reply_markup)
+@restricted
+async def downloads_page_chosen(update: Update, context: CallbackContext) -> None:
+    """Handles filter, sort and page buttons on the /downloads message by editing it in place."""
+    query = update.callback_query
+    if not query or not query.data:
         return
 
-    if not message:
-        await update.message.reply_text("Could not retrieve download status or no active downloads.", reply_markup=reply_markup)
+    try:
+        await query.answer()
+    except Exception as e:
+        logger.warning(f"Could not answer callback query: {e}")
+
+    try:
+        _, status_filter, sort, page_str = query.data.split(':')
+        page = max(0, int(page_str))
+    except ValueError:
+        logger.warning(f"Malformed downloads callback data: {query.data}")
         return
 
-    # Split message safely by lines if length exceeds Telegram limits (4000 chars)
-    max_len = 4000
-    if len(message) <= max_len:
-        try:
-            await update.message.reply_text(message, parse_mode='HTML', reply_markup=reply_markup)
-        except Exception:
-            logger.exception("Failed to send formatted HTML download message. Falling back to plain text.")
-            await update.message.reply_text(message, reply_markup=reply_markup)
-    else:
-        lines = message.split('\n')
-        chunks = []
-        current_chunk = []
-        current_len = 0
-
-        for line in lines:
-            if current_len + len(line) + 1 > max_len:
-                chunks.append('\n'.join(current_chunk))
-                current_chunk = [line]
-                current_len = len(line) + 1
-            else:
-                current_chunk.append(line)
-                current_len += len(line) + 1
-
-        if current_chunk:
-            chunks.append('\n'.join(current_chunk))
-
-        for idx, chunk in enumerate(chunks):
-            is_last = (idx == len(chunks) - 1)
-            chunk_markup = reply_markup if is_last else None
-            try:
-                await update.message.reply_text(chunk, parse_mode='HTML', reply_markup=chunk_markup)
-            except Exception:
-                await update.message.reply_text(chunk, reply_markup=chunk_markup)
+    try:
+        message, reply_markup = await _render_downloads_page(status_filter, sort, page)
+    except UpstreamBusy as e:
+        # Leave the current page in place rather than replacing it with the error
+        if update.effective_chat:
+            await context.bot.send_message(chat_id=update.effective_chat.id, text=_busy_text(e))
+        return
+
+    live_job = None
+    if query.message:
+        live_job = _find_live_downloads_job(context, query.message.chat_id, query.message.message_id)
+    if live_job:
+        # Keep the live refresh on the view the user just picked
+        message += _live_downloads_footer(final=False)
+        live_job.data['view'] = (status_filter, sort, page)
+        live_job.data['last_text'] = message
+
+    try:
+        await query.edit_message_text(message, parse_mode='HTML', reply_markup=reply_markup)
+    except BadRequest as e:
+        # Pressing the refresh button when nothing changed is not an error
+        if 'not modified' not in str(e).lower():
+            logger.warning(f"Could not edit downloads message: {e}")
+
+
+def _format_duration(seconds: float) -> str:
+    """Formats a duration as e.g. '3d 4h 12m' or '850ms' for sub-second values."""
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    minutes, _ = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    parts = [f"{days}d"] if days else []
+    if days or hours:
+        parts.append(f"{hours}h")
+    parts.append(f"{minutes}m")
+    return ' '.join(parts)
+
+
+def _render_stats(context: CallbackContext) -> str:
+    """Builds the /stats message from the in-memory counters."""
+    lines = [
+        "📈 <b>Bot Stats</b>",
+        f"Uptime: {_format_duration(time.monotonic() - STARTED_AT)}",
+        f"Active conversations: {count_active_conversations(context.application.user_data)}",
+    ]
+    rss = process_rss()
+    if rss is not None:
+        lines.append(f"Memory (RSS): {rss / (1024 * 1024):.1f} MiB")
+
+    lines.append(f"\n<b>Latency</b> (last {_format_duration(STATS_WINDOW)})")
+    latencies = latency_summary()
+    for upstream, (count, p50, p95) in latencies.items():
+        lines.append(
+            f"• {_UPSTREAM_NAMES.get(upstream, upstream)}: p50 {_format_duration(p50)}, "
+            f"p95 {_format_duration(p95)} ({count} calls)"
+        )
+    if not latencies:
+        lines.append("• No upstream calls yet")
+
+    search = search_cache.stats()
+    images = file_id_cache.stats()
+    lines.extend([
+        "\n<b>Caches</b>",
+        f"• Searches: {search['hit_rate']:.0%} hit rate, {search['size']} queries, {search['stale_served']} stale served",
+        f"• Images: {images['hit_rate']:.0%} hit rate, {images['size']} file_ids",
+    ])
+
+    breakers = breaker_stats()
+    if breakers:
+        lines.append("\n<b>Circuits</b>")
+        for upstream, stats in sorted(breakers.items()):
+            state = {'closed': "🟢 closed", 'half_open': "🟡 half-open", 'open': "🔴 open"}.get(stats['state'], stats['state'])
+            lines.append(f"• {_UPSTREAM_NAMES.get(upstream, upstream)}: {state}, opened {stats['opened']}×")
+    return '\n'.join(lines)
+
+
+@restricted
+@admin_only
+async def stats_command(update: Update, context: CallbackContext) -> None:
+    """Handles /stats by showing uptime, upstream latency, cache, circuit and memory counters to admins."""
+    if update.message:
+        await update.message.reply_text(_render_stats(context), parse_mode='HTML')
+
+
+@restricted
+@admin_only
+async def profile_command(update: Update, context: CallbackContext) -> None:
+    """Handles /profile N by profiling the next N handler runs; '/profile off' disarms and '/profile' shows the status."""
+    if not update.message:
+        return
+    if context.args:
+        arg = context.args[0].lower()
+        if arg == 'off':
+            handler_profiler.arm(0)
+        elif arg.isdigit():
+            handler_profiler.arm(int(arg))
+        else:
+            await update.message.reply_text("Usage: /profile [N|off]")
+            return
+    await update.message.reply_text(
+        f"🔬 Profiling the next {handler_profiler.armed} handler runs"
+        f" (sample rate {handler_profiler.sample_rate:.1%}).\n"
+        f"{handler_profiler.captured} profiles written to <code>{html.escape(handler_profiler.directory)}</code>.",
+        parse_mode='HTML'
+    )
 
 
 @restricted
@@ -184,25 +513,55 @@ async def search_type_chosen(update: Update, context: CallbackContext) -> int:
             await query.edit_message_text("⚠️ Spotify integration is not configured on this server.")
             return await _restart_conversation(update, context)
         await query.edit_message_text("🎵 Please enter the Spotify Playlist URL:")
+    elif search_type == 'anything':
+        await query.edit_message_text("🔎 Searching both <b>movies and series</b>. Please enter the title:", parse_mode='HTML')
     else:
         await query.edit_message_text(f"🔍 Searching for a <b>{html.escape(str(search_type))}</b>. Please enter the title:", parse_mode='HTML')
     return SEARCH_QUERY
 
 
-async def _render_search_results(update: Update, context: CallbackContext, results: list) -> int:
-    """Displays search results with inline buttons."""
-    context.user_data['search_results'] = results
-    keyboard = []
-    for i, item in enumerate(results[:10]):
-        title = item.get('title', 'N/A')
-        year = item.get('year', '')
-        button_text = f"{title} ({year})" if year else str(title)
-        keyboard.append([InlineKeyboardButton(button_text, callback_data=f'choose_{i}')])
+_MEDIA_TYPE_ICONS = {'movie': "🎬", 'series': "📺"}
+
 
+def _build_search_results_keyboard(
+    results: list[SearchResult], order: list[int] | None = None, selected: set[int] | None = None
+) -> InlineKeyboardMarkup:
+    """Builds one button per result plus a checkbox to select it for a bulk add.
+
+    With an explicit display order, buttons are marked with their media type.
+    """
+    selected = selected or set()
+    keyboard = []
+    for i in order if order is not None else range(len(results)):
+        item = results[i]
+        button_text = f"{item.title} ({item.year})" if item.year else item.title
+        owned = in_library(item)
+        if owned:
+            button_text = f"📚 {button_text}"
+        if order is not None:
+            button_text = f"{_MEDIA_TYPE_ICONS.get(item.media_type, '')} {button_text}"
+        # Callback data indexes the stored list, which is append-only, so clicks stay valid when ranking changes
+        row = [InlineKeyboardButton(button_text, callback_data=f'choose_{i}')]
+        if not owned:
+            row.insert(0, InlineKeyboardButton("☑️" if i in selected else "☐", callback_data=f'select_{i}'))
+        keyboard.append(row)
+
+    if selected:
+        keyboard.append([InlineKeyboardButton(f"✅ Add {len(selected)} selected", callback_data='bulk_add')])
     keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data='cancel')])
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    return InlineKeyboardMarkup(keyboard)
+
+
+async def _render_search_results(update: Update, context: CallbackContext, results: list[SearchResult]) -> int:
+    """Displays search results with inline buttons."""
+    context.user_data['search_results'] = results
+    reply_markup = _build_search_results_keyboard(
+        results, context.user_data.get('search_order'), context.user_data.get('search_selected')
+    )
 
     message_text = "Here's what I found:"
+    if context.user_data.get('search_notice'):
+        message_text += f"\n\n{context.user_data['search_notice']}"
     if update.callback_query:
         await update.callback_query.edit_message_text(message_text, reply_markup=reply_markup)
     elif update.message:
@@ -210,54 +569,183 @@ async def _render_search_results(update: Update, context: CallbackContext, resul
     return CHOOSE_ITEM
 
 
-def _sync_spotify_playlist(query_text: str) -> tuple[dict | None, str | None]:
-    """Helper to communicate with Spotify service synchronously in worker thread."""
-    if not SPOTIFY_API_URL:
-        return None, "Spotify service URL (SPOTIFY_API_URL) is not configured."
+def _rank_results(query_text: str, results: list[SearchResult]) -> list[int]:
+    """Orders merged movie/series results: exact title matches, then prefix, then substring, then upstream rank."""
+    needle = SearchCache.normalize(query_text)
+    upstream_rank: dict[int, int] = {}
+    seen_per_type: dict[str, int] = {}
+    for i, item in enumerate(results):
+        upstream_rank[i] = seen_per_type.get(item.media_type, 0)
+        seen_per_type[item.media_type] = upstream_rank[i] + 1
+
+    def score(i: int) -> tuple[int, int]:
+        title = SearchCache.normalize(results[i].title)
+        if title == needle:
+            tier = 0
+        elif title.startswith(needle):
+            tier = 1
+        elif needle in title:
+            tier = 2
+        else:
+            tier = 3
+        return tier, upstream_rank[i]
+
+    return sorted(range(len(results)), key=score)[:SEARCH_RESULT_LIMIT]
+
+
+async def _search_anything(update: Update, context: CallbackContext, query_text: str) -> int:
+    """Searches Radarr and Sonarr concurrently, showing the first service's results while the other is still running."""
+    pending = {
+        asyncio.create_task(search_radarr(query_text)): 'Radarr',
+        asyncio.create_task(search_sonarr(query_text)): 'Sonarr',
+    }
+    results: list[SearchResult] = []
+    results_message = None
+    busy: UpstreamBusy | None = None
+    unreachable: list[str] = []
+    stale: list[str] = []
+    # Services that failed while the other one returned results
+    missing: list[str] = []
+
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            service_name = pending.pop(task)
+            try:
+                found = task.result()
+            except UpstreamBusy as e:
+                busy = e
+                missing.append(service_name)
+                continue
+            except Exception:
+                logger.exception("Search task failed during combined search")
+                missing.append(service_name)
+                continue
+            if found is None:
+                unreachable.append(service_name)
+                missing.append(service_name)
+                continue
+            if search_cache.is_stale(service_name.lower(), query_text):
+                stale.append(service_name)
+            results.extend(found)
+        if not results:
+            continue
+
+        order = _rank_results(query_text, results)
+        context.user_data['search_results'] = results
+        context.user_data['search_order'] = order
+        notices = ([_stale_notice(stale)] if stale else []) + ([_missing_notice(missing)] if missing else [])
+        context.user_data['search_notice'] = '\n\n'.join(notices) or None
+        message_text = "Here's what I found:"
+        if pending:
+            message_text = f"Here's what I found so far (still searching {', '.join(pending.values())}...):"
+        if notices:
+            message_text += f"\n\n{context.user_data['search_notice']}"
+        reply_markup = _build_search_results_keyboard(results, order, context.user_data.get('search_selected'))
+        if results_message is None:
+            results_message = await update.message.reply_text(message_text, reply_markup=reply_markup)
+        else:
+            try:
+                await results_message.edit_text(message_text, reply_markup=reply_markup)
+            except BadRequest as e:
+                logger.warning(f"Could not update combined search results: {e}")
 
-    api_endpoint = f"{SPOTIFY_API_URL.rstrip('/')}/api/saved-items"
-    try:
-        payload1 = {"search": query_text}
-        res1 = http_session.post(api_endpoint, json=payload1, timeout=DEFAULT_TIMEOUT)
-        res1.raise_for_status()
-        data = res1.json()
-
-        playlist = None
-        if isinstance(data, list):
-            for item in data:
-                if isinstance(item, dict) and item.get("type") == "spotify-playlist":
-                    playlist = item
-                    break
-
-        if not playlist:
-            return None, "Could not find a valid Spotify playlist from that URL."
-
-        playlist_id = playlist.get("id")
-        if not playlist_id:
-            return None, "Playlist ID not found in the response."
-
-        payload2 = {"ids": [playlist_id], "sync": True, "sync_interval": "10", "label": ""}
-        res2 = http_session.put(api_endpoint, json=payload2, timeout=DEFAULT_TIMEOUT)
-        res2.raise_for_status()
-
-        return playlist, None
-    except requests.exceptions.ConnectionError:
-        logger.exception(f"Connection refused to Spotify service at {SPOTIFY_API_URL}")
-        return None, f"Could not connect to Spotify service at {SPOTIFY_API_URL}. Check that the service is running and reachable."
-    except requests.exceptions.Timeout:
-        logger.exception(f"Timeout connecting to Spotify service at {SPOTIFY_API_URL}")
-        return None, f"Timeout connecting to Spotify service at {SPOTIFY_API_URL}."
-    except requests.RequestException as e:
-        logger.exception("Network error while adding Spotify playlist")
-        return None, f"Network error: {e}"
-    except Exception as e:
-        logger.exception("Unexpected error while adding Spotify playlist")
-        return None, f"Unexpected error: {e}"
+    if not results:
+        if busy:
+            raise busy
+        if unreachable:
+            await update.message.reply_text(f"❌ Could not reach {' or '.join(unreachable)}. Please try again later.")
+            return await _restart_conversation(update, context)
+        await update.message.reply_text("Sorry, I couldn't find anything matching that title.")
+        return await _restart_conversation(update, context)
+    return CHOOSE_ITEM
+
+
+async def _resolve_title(search_type: str, title: str) -> SearchResult | None:
+    """Looks up one pasted title and returns its best match, or None if nothing was found.
+
+    Raises UpstreamBusy if nothing was found because a service was saturated, so the title can be retried.
+    """
+    searches = []
+    if search_type in ('movie', 'anything'):
+        searches.append(search_radarr(title))
+    if search_type in ('series', 'anything'):
+        searches.append(search_sonarr(title))
+    results: list[SearchResult] = []
+    busy: UpstreamBusy | None = None
+    for found in await asyncio.gather(*searches, return_exceptions=True):
+        if isinstance(found, list):
+            results.extend(found)
+        elif isinstance(found, UpstreamBusy):
+            busy = found
+        elif isinstance(found, Exception):
+            logger.warning(f"Lookup for pasted title '{title}' failed: {found}")
+    if not results:
+        if busy:
+            raise busy
+        return None
+    return results[_rank_results(title, results)[0]]
+
+
+async def _resolve_title_list(update: Update, context: CallbackContext, search_type: str, titles: list[str]) -> int:
+    """Resolves pasted titles (one per line) in parallel and shows one sheet with every match preselected.
+
+    Only the first MAX_PASTED_TITLES are looked up; the user is told how many were ignored.
+    """
+    ignored = max(0, len(titles) - MAX_PASTED_TITLES)
+    titles = titles[:MAX_PASTED_TITLES]
+    ignored_notice = f"⚠️ Only the first {MAX_PASTED_TITLES} titles are looked up; {ignored} more were ignored." if ignored else ""
+    await update.message.reply_text(
+        f"⏳ Looking up {len(titles)} titles..." + (f"\n{ignored_notice}" if ignored_notice else "")
+    )
+    semaphore = asyncio.Semaphore(BULK_ADD_CONCURRENCY)
+
+    async def resolve(title: str) -> SearchResult | UpstreamBusy | None:
+        async with semaphore:
+            try:
+                return await _resolve_title(search_type, title)
+            except UpstreamBusy as e:
+                return e
+
+    matches = await asyncio.gather(*(resolve(title) for title in titles))
+
+    results: list[SearchResult] = []
+    lines = []
+    for title, match in zip(titles, matches):
+        if isinstance(match, UpstreamBusy):
+            lines.append(f"⏳ {html.escape(title)}: {_UPSTREAM_NAMES.get(match.upstream, match.upstream)} busy, try again in a moment")
+            continue
+        if match is None:
+            lines.append(f"❌ {html.escape(title)}: not found")
+            continue
+        match_text = html.escape(f"{match.title} ({match.year})" if match.year else match.title)
+        lines.append(f"{_MEDIA_TYPE_ICONS.get(match.media_type, '')} {html.escape(title)} → <b>{match_text}</b>")
+        if match not in results:
+            results.append(match)
+    if not results:
+        busy = next((match for match in matches if isinstance(match, UpstreamBusy)), None)
+        await update.message.reply_text(_busy_text(busy) if busy else "Sorry, I couldn't find any of those titles.")
+        return await _restart_conversation(update, context)
+
+    context.user_data['search_results'] = results
+    context.user_data['search_order'] = list(range(len(results)))
+    context.user_data['search_notice'] = None
+    context.user_data['search_selected'] = {i for i, item in enumerate(results) if not in_library(item)}
+    message_text = (
+        f"📋 Found {sum(1 for match in matches if isinstance(match, SearchResult))} of {len(titles)} titles:\n\n" + '\n'.join(lines)
+        + (f"\n\n{ignored_notice}" if ignored_notice else "")
+        + "\n\nUntick anything you don't want, then add the rest."
+    )
+    reply_markup = _build_search_results_keyboard(
+        results, context.user_data['search_order'], context.user_data['search_selected']
+    )
+    await update.message.reply_text(message_text, parse_mode='HTML', reply_markup=reply_markup)
+    return CHOOSE_ITEM
 
 
 @restricted
 async def search_query_received(update: Update, context: CallbackContext) -> int:
-    """Performs search in worker thread and renders results."""
+    """Performs the search on the event loop and renders results."""
     if not update.message or not update.message.text:
         return ConversationHandler.END
 
@@ -266,7 +754,7 @@ async def search_query_received(update: Update, context: CallbackContext) -> int
 
     if search_type == 'spotify':
         await update.message.reply_text("⏳ Processing Spotify playlist...")
-        playlist, error = await asyncio.to_thread(_sync_spotify_playlist, query_text)
+        playlist, error = await add_spotify_playlist(query_text)
 
         if error or not playlist:
             await update.message.reply_text(f"❌ {error or 'Failed to add Spotify playlist.'}")
@@ -280,9 +768,10 @@ async def search_query_received(update: Update, context: CallbackContext) -> int
 
         if image_url:
             try:
-                await context.bot.send_photo(
+                await _send_photo_cached(
+                    context,
                     chat_id=update.effective_chat.id,
-                    photo=image_url,
+                    photo_url=image_url,
                     caption=message_text,
                     parse_mode='HTML'
                 )
@@ -311,16 +800,30 @@ async def search_query_received(update: Update, context: CallbackContext) -> int
         )
         return ConversationHandler.END
 
+    titles = [line.strip() for line in query_text.splitlines() if line.strip()]
+    if len(titles) > 1:
+        return await _resolve_title_list(update, context, search_type, titles)
+
+    if search_type == 'anything':
+        await update.message.reply_text(f"⏳ Searching movies and series: <i>{html.escape(query_text)}</i>...", parse_mode='HTML')
+        return await _search_anything(update, context, query_text)
+
     await update.message.reply_text(f"⏳ Searching for {search_type}: <i>{html.escape(query_text)}</i>...", parse_mode='HTML')
 
+    context.user_data.pop('search_order', None)
+    context.user_data.pop('search_notice', None)
     results = []
+    service_name = 'Sonarr' if search_type == 'series' else 'Radarr'
     if search_type == 'movie':
-        results = await asyncio.to_thread(search_radarr, query_text)
+        results = await search_radarr(query_text)
     elif search_type == 'series':
-        results = await asyncio.to_thread(search_sonarr, query_text)
+        results = await search_sonarr(query_text)
 
     if results is None:
+        await update.message.reply_text(f"❌ Could not reach {service_name}. Please try again later.")
         return await _restart_conversation(update, context)
+    if results and search_cache.is_stale(service_name.lower(), query_text):
+        context.user_data['search_notice'] = _stale_notice([service_name])
     if not results:
         await update.message.reply_text("Sorry, I couldn't find anything matching that title.")
         return await _restart_conversation(update, context)
@@ -328,6 +831,26 @@ async def search_query_received(update: Update, context: CallbackContext) -> int
     return await _render_search_results(update, context, results)
 
 
+def _build_confirm_keyboard(item: SearchResult, targets: set[str]) -> InlineKeyboardMarkup:
+    """Confirmation card buttons, with a checkbox per instance when the item's service has several."""
+    keyboard = []
+    instances = ARR_INSTANCES[item.media_type]
+    if len(instances) > 1:
+        keyboard.extend(
+            [InlineKeyboardButton(
+                f"{'☑️' if instance.upstream in targets else '☐'} {instance.name}",
+                callback_data=f'target_{instance.upstream}',
+            )]
+            for instance in instances
+        )
+    keyboard += [
+        [InlineKeyboardButton("✅ Add this", callback_data='confirm_add')],
+        [InlineKeyboardButton("⬅️ Back to search results", callback_data='back_to_results')],
+        [InlineKeyboardButton("❌ Cancel Search", callback_data='cancel_search_completely')],
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+
 @restricted
 async def item_chosen(update: Update, context: CallbackContext) -> int:
     """Handles item selection from search results and displays confirmation card."""
@@ -363,42 +886,28 @@ async def item_chosen(update: Update, context: CallbackContext) -> int:
         chosen_item = results[choice_index]
         context.user_data['chosen_item'] = chosen_item
 
-        title = chosen_item.get('title', 'N/A')
-        year = chosen_item.get('year', '')
-        overview = chosen_item.get('overview', 'No description available.')
-        poster_url = None
-        images = chosen_item.get('images', [])
-        if isinstance(images, list):
-            poster_info = next((img for img in images if isinstance(img, dict) and img.get('coverType') == 'poster'), None)
-            if poster_info:
-                poster_url = poster_info.get('remoteUrl') or poster_info.get('url')
-
-        title_str = html.escape(str(title) if title is not None else 'N/A')
-        overview_str = html.escape(str(overview) if overview is not None else 'No description available.')
-
-        rating_value = None
-        ratings_data = chosen_item.get('ratings')
-        if isinstance(ratings_data, dict) and ratings_data.get('value') is not None:
-            rating_value = ratings_data['value']
-
-        message_text = f"<b>{title_str} ({year})</b>\n\n{overview_str}"
-        if rating_value is not None:
-            message_text += f"\n\n❤️ {rating_value}"
-
-        keyboard = [
-            [InlineKeyboardButton("✅ Add this", callback_data='confirm_add')],
-            [InlineKeyboardButton("⬅️ Back to search results", callback_data='back_to_results')],
-            [InlineKeyboardButton("❌ Cancel Search", callback_data='cancel_search_completely')],
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        poster_url = chosen_item.poster_url
+        title_str = html.escape(chosen_item.title)
+        overview_str = html.escape(chosen_item.overview)
+
+        message_text = f"<b>{title_str} ({chosen_item.year or ''})</b>\n\n{overview_str}"
+        if chosen_item.rating is not None:
+            message_text += f"\n\n❤️ {chosen_item.rating}"
+        if in_library(chosen_item):
+            message_text += "\n\n📚 <i>Already in your library.</i>"
+
+        targets = {instance.upstream for instance in default_instances(chosen_item.media_type)}
+        context.user_data['add_targets'] = targets
+        reply_markup = _build_confirm_keyboard(chosen_item, targets)
 
         await query.delete_message()
 
         if poster_url and update.effective_chat:
             try:
-                await context.bot.send_photo(
+                await _send_photo_cached(
+                    context,
                     chat_id=update.effective_chat.id,
-                    photo=poster_url,
+                    photo_url=poster_url,
                     caption=message_text,
                     reply_markup=reply_markup,
                     parse_mode='HTML'
@@ -428,6 +937,95 @@ async def item_chosen(update: Update, context: CallbackContext) -> int:
         return await _restart_conversation(update, context)
 
 
+def _instance_outcome(add_result: bool | str) -> str:
+    """Short status of one instance, for adds that went to several."""
+    if add_result is True:
+        return "✅ added, search started"
+    if add_result in _EXISTS_CODES:
+        return "⚠️ already there"
+    if add_result == 'ServiceUnavailable':
+        return "❌ unreachable, try again later"
+    if add_result == 'UpstreamBusy':
+        return "⏳ busy, try again in a moment"
+    if isinstance(add_result, str):
+        return f"❌ failed (<code>{html.escape(add_result)}</code>)"
+    return "❌ failed, check logs"
+
+
+def _add_result_text(item: SearchResult, results: list[tuple[ArrInstance, bool | str]]) -> tuple[bool, str]:
+    """Merges the per-instance outcomes of one add into whether anything was added and the text to report.
+
+    An add that went to a single instance reads as before; several get one status line per instance.
+    """
+    title_str = html.escape(item.title)
+    added = any(add_result is True for _, add_result in results)
+    if len(results) > 1:
+        lines = [f"<b>{title_str}</b>"]
+        lines += [f"• {html.escape(instance.name)}: {_instance_outcome(add_result)}" for instance, add_result in results]
+        return added, '\n'.join(lines)
+
+    instance, add_result = results[0]
+    target_service = html.escape(instance.name)
+    if add_result == 'UpstreamBusy':
+        return False, f"{_busy_text(UpstreamBusy(instance.upstream))} <b>{title_str}</b> was not added."
+    if add_result == 'ServiceUnavailable':
+        return False, f"❌ {target_service} is unreachable right now. <b>{title_str}</b> was not added; please try again later."
+    if add_result is True:
+        return True, f"✅ Successfully added <b>{title_str}</b> and started search."
+    if isinstance(add_result, str):
+        if add_result in _EXISTS_CODES:
+            return False, f"⚠️ <b>{title_str}</b> already exists in {target_service}."
+        return False, f"❌ Failed to add <b>{title_str}</b>. Error code: <code>{add_result}</code>."
+    return False, f"❌ Failed to add <b>{title_str}</b>. Check logs for details."
+
+
+async def _add_to_instances(
+    item: SearchResult, instances: list[ArrInstance] | None = None
+) -> list[tuple[ArrInstance, bool | str]]:
+    """Sends an add to the given Radarr or Sonarr instances concurrently (the default ones if none are given)."""
+    if item.media_type == 'series':
+        return await add_series_to_sonarr(item, instances)
+    return await add_movie_to_radarr(item, instances)
+
+
+async def _submit_add(
+    item: SearchResult, chat_id: int | None, instances: list[ArrInstance] | None = None
+) -> tuple[bool, str]:
+    """Adds one item to its Radarr or Sonarr instances and returns whether it was added anywhere and the text to report.
+
+    The chat is recorded for a completion message when download notifications are enabled.
+    """
+    added, text = _add_result_text(item, await _add_to_instances(item, instances))
+    if added and NOTIFY_PORT and chat_id is not None:
+        requester_registry.record(item.media_type, item.external_id, chat_id)
+    return added, text
+
+
+@restricted
+async def add_target_toggled(update: Update, context: CallbackContext) -> int:
+    """Handles an instance checkbox on the confirmation card by toggling it as a target of the add."""
+    query = update.callback_query
+    if not query or not query.data:
+        return ConversationHandler.END
+    chosen_item = context.user_data.get('chosen_item')
+    upstream = query.data.removeprefix('target_')
+    if not chosen_item or upstream not in {instance.upstream for instance in ARR_INSTANCES[chosen_item.media_type]}:
+        await query.answer("This item is no longer available.")
+        return CONFIRM_ADD
+
+    targets: set[str] = context.user_data.setdefault('add_targets', set())
+    if targets == {upstream}:
+        await query.answer("Pick at least one server.")
+        return CONFIRM_ADD
+    targets.symmetric_difference_update({upstream})
+    await query.answer()
+    try:
+        await query.edit_message_reply_markup(reply_markup=_build_confirm_keyboard(chosen_item, targets))
+    except BadRequest as e:
+        logger.warning(f"Could not update target keyboard: {e}")
+    return CONFIRM_ADD
+
+
 @restricted
 async def add_item_confirmed(update: Update, context: CallbackContext) -> int:
     """Adds the chosen item to Sonarr/Radarr non-blockingly."""
@@ -454,16 +1052,17 @@ async def add_item_confirmed(update: Update, context: CallbackContext) -> int:
         return await _restart_conversation(update, context)
 
     chosen_item = context.user_data.get('chosen_item')
-    search_type = context.user_data.get('search_type')
 
-    if not chosen_item or not search_type:
-        logger.error("Missing context (chosen_item or search_type) in add_item_confirmed.")
+    if not chosen_item:
+        logger.error("Missing context (chosen_item) in add_item_confirmed.")
         await query.delete_message()
         return await _restart_conversation(update, context)
 
-    title = chosen_item.get('title', 'N/A')
-    title_str = html.escape(str(title) if title is not None else 'N/A')
-    target_service = 'Sonarr' if search_type == 'series' else 'Radarr'
+    title_str = html.escape(chosen_item.title)
+    # Dispatch on the item itself: combined searches mix movies and series
+    targets = context.user_data.get('add_targets') or ()
+    instances = [instance for instance in ARR_INSTANCES[chosen_item.media_type] if instance.upstream in targets]
+    target_service = html.escape(', '.join(instance.name for instance in instances or default_instances(chosen_item.media_type)))
 
     caption_text_adding = f"⏳ Adding '{title_str}' to {target_service}..."
     try:
@@ -474,22 +1073,11 @@ async def add_item_confirmed(update: Update, context: CallbackContext) -> int:
     except Exception as e_edit:
         logger.warning(f"Could not edit message to 'Adding...': {e_edit}")
 
-    # Perform blocking add in worker thread
-    add_result = False
-    if search_type == 'movie':
-        add_result = await asyncio.to_thread(add_movie_to_radarr, chosen_item)
-    elif search_type == 'series':
-        add_result = await asyncio.to_thread(add_series_to_sonarr, chosen_item)
-
-    if add_result is True:
-        result_text = f"✅ Successfully added <b>{title_str}</b> and started search."
-    elif isinstance(add_result, str):
-        if add_result in ('SeriesExistsValidator', 'MovieExistsValidator'):
-            result_text = f"⚠️ <b>{title_str}</b> already exists in {target_service}."
-        else:
-            result_text = f"❌ Failed to add <b>{title_str}</b>. Error code: <code>{add_result}</code>."
-    else:
-        result_text = f"❌ Failed to add <b>{title_str}</b>. Check logs for details."
+    added, result_text = await _submit_add(
+        chosen_item, update.effective_chat.id if update.effective_chat else None, instances or None
+    )
+    if added and NOTIFY_PORT:
+        result_text += " I'll message you when it's ready."
 
     try:
         if query.message and query.message.caption:
@@ -501,7 +1089,12 @@ async def add_item_confirmed(update: Update, context: CallbackContext) -> int:
             await context.bot.send_message(chat_id=update.effective_chat.id, text=result_text, parse_mode='HTML')
 
     _clear_user_data(context)
+    await _send_next_search_menu(update, context)
+    return ConversationHandler.END
 
+
+async def _send_next_search_menu(update: Update, context: CallbackContext) -> None:
+    """Offers the search menu again after an add finished."""
     user = update.effective_user
     user_name = user.mention_html() if user else "there"
     reply_markup = _build_main_menu_keyboard()
@@ -514,9 +1107,232 @@ async def add_item_confirmed(update: Update, context: CallbackContext) -> int:
             parse_mode='HTML'
         )
 
+
+@restricted
+async def selection_toggled(update: Update, context: CallbackContext) -> int:
+    """Handles a result checkbox by toggling the item in the bulk-add selection and redrawing the keyboard."""
+    query = update.callback_query
+    if not query or not query.data:
+        return ConversationHandler.END
+    results = context.user_data.get('search_results') or []
+    index = int(query.data.removeprefix('select_'))
+    if not 0 <= index < len(results):
+        await query.answer("This result is no longer available.")
+        return CHOOSE_ITEM
+
+    selected: set[int] = context.user_data.setdefault('search_selected', set())
+    selected.symmetric_difference_update({index})
+    await query.answer()
+    try:
+        await query.edit_message_reply_markup(
+            reply_markup=_build_search_results_keyboard(results, context.user_data.get('search_order'), selected)
+        )
+    except BadRequest as e:
+        logger.warning(f"Could not update selection keyboard: {e}")
+    return CHOOSE_ITEM
+
+
+async def _submit_bulk_add(items: list[SearchResult], chat_id: int | None) -> list[tuple[bool, str]]:
+    """Adds items concurrently, at most BULK_ADD_CONCURRENCY at a time, returning each outcome in order."""
+    semaphore = asyncio.Semaphore(BULK_ADD_CONCURRENCY)
+
+    async def add_one(item: SearchResult) -> tuple[bool, str]:
+        async with semaphore:
+            try:
+                return await _submit_add(item, chat_id)
+            except Exception:
+                logger.exception(f"Bulk add failed for '{item.title}'")
+                return False, f"❌ Failed to add <b>{html.escape(item.title)}</b>. Check logs for details."
+
+    return await asyncio.gather(*(add_one(item) for item in items))
+
+
+@restricted
+async def bulk_add_confirmed(update: Update, context: CallbackContext) -> int:
+    """Handles "Add N selected" by submitting every selected result at once and reporting one combined result."""
+    query = update.callback_query
+    if not query:
+        return ConversationHandler.END
+    results = context.user_data.get('search_results') or []
+    selected = sorted(i for i in context.user_data.get('search_selected') or () if 0 <= i < len(results))
+    if not selected:
+        await query.answer("Nothing selected.")
+        return CHOOSE_ITEM
+    await query.answer()
+
+    items = [results[i] for i in selected]
+    try:
+        await query.edit_message_text(f"⏳ Adding {len(items)} items...", reply_markup=None)
+    except BadRequest as e:
+        logger.warning(f"Could not edit message to 'Adding...': {e}")
+
+    outcomes = await _submit_bulk_add(items, update.effective_chat.id if update.effective_chat else None)
+    added = sum(1 for ok, _ in outcomes if ok)
+    result_text = f"<b>Added {added} of {len(items)}:</b>\n\n" + '\n'.join(line for _, line in outcomes)
+    if added and NOTIFY_PORT:
+        result_text += "\n\nI'll message you as each one is ready."
+    try:
+        await query.edit_message_text(result_text, parse_mode='HTML')
+    except BadRequest:
+        if update.effective_chat:
+            await context.bot.send_message(chat_id=update.effective_chat.id, text=result_text, parse_mode='HTML')
+
+    _clear_user_data(context)
+    await _send_next_search_menu(update, context)
     return ConversationHandler.END
 
 
+# Inline mode: one pending debounced lookup per user, superseded by each new keystroke
+_inline_tasks: dict[int, asyncio.Task] = {}
+# Items offered in recent inline answers, so an "Add" press on the sent message can find them again
+_inline_items: OrderedDict[str, SearchResult] = OrderedDict()
+_INLINE_ITEMS_SIZE = 500
+# A cached shorter query is reused only if this many of its results still match what was typed
+_INLINE_PREFIX_MIN_MATCHES = 3
+
+
+def _matches_typed_query(query_text: str, item: SearchResult) -> bool:
+    """True if every typed word starts a word of the item's title, e.g. 'dune pa' matches 'Dune: Part Two'."""
+    title_words = ''.join(c if c.isalnum() else ' ' for c in SearchCache.normalize(item.title)).split()
+    query_words = ''.join(c if c.isalnum() else ' ' for c in SearchCache.normalize(query_text)).split()
+    return all(any(word.startswith(typed) for word in title_words) for typed in query_words)
+
+
+def _cached_inline_results(query_text: str) -> list[SearchResult] | None:
+    """Answers a query from the search cache without a lookup, from an exact entry or a shorter typed prefix."""
+    results: list[SearchResult] = []
+    from_prefix = False
+    for service in ('radarr', 'sonarr'):
+        cached = search_cache.peek(service, query_text, min_prefix=INLINE_MIN_QUERY_LENGTH)
+        if cached is None:
+            return None
+        cached_query, found = cached
+        if cached_query != SearchCache.normalize(query_text):
+            from_prefix = True
+            found = [item for item in found if _matches_typed_query(query_text, item)]
+        results.extend(found)
+    if from_prefix and len(results) < _INLINE_PREFIX_MIN_MATCHES:
+        return None
+    return results
+
+
+def _build_inline_results(query_text: str, results: list[SearchResult]) -> list[InlineQueryResultArticle]:
+    """Builds one article per ranked result; choosing it posts a card with an Add button.
+
+    Telegram rejects the whole answer if two articles share an id, so results without a tmdb/tvdb ID (or
+    repeating one) are left out.
+    """
+    articles = []
+    for i in _rank_results(query_text, results):
+        item = results[i]
+        key = f"{item.media_type}:{item.external_id}"
+        if item.external_id is None or any(article.id == key for article in articles):
+            continue
+        _inline_items[key] = item
+        _inline_items.move_to_end(key)
+
+        title = f"{_MEDIA_TYPE_ICONS.get(item.media_type, '')} {item.title}" + (f" ({item.year})" if item.year else '')
+        owned = in_library(item)
+        description = ("📚 In your library · " if owned else '') + item.overview[:120]
+        text = f"<b>{html.escape(item.title)}{f' ({item.year})' if item.year else ''}</b>\n\n{html.escape(item.overview[:600])}"
+        if owned:
+            text += "\n\n📚 <i>Already in your library.</i>"
+        reply_markup = None
+        if not owned:
+            reply_markup = InlineKeyboardMarkup([[InlineKeyboardButton("✅ Add this", callback_data=f'iadd:{key}')]])
+        articles.append(InlineQueryResultArticle(
+            id=key,
+            title=title,
+            description=description,
+            thumbnail_url=item.poster_url,
+            input_message_content=InputTextMessageContent(text, parse_mode='HTML'),
+            reply_markup=reply_markup,
+        ))
+    while len(_inline_items) > _INLINE_ITEMS_SIZE:
+        _inline_items.popitem(last=False)
+    return articles
+
+
+async def _answer_inline_query(update: Update, query_text: str, results: list[SearchResult]) -> None:
+    try:
+        # Personal: the answer holds this user's library badges and must not be served to anyone else
+        await update.inline_query.answer(_build_inline_results(query_text, results), cache_time=60, is_personal=True)
+    except BadRequest as e:
+        # The user kept typing and Telegram expired this query, or the query was too old
+        logger.debug(f"Could not answer inline query '{query_text}': {e}")
+
+
+async def _search_inline_after_debounce(update: Update, query_text: str) -> None:
+    """Waits out the debounce, then looks up both services and answers. Cancelled when the user types on."""
+    await asyncio.sleep(INLINE_DEBOUNCE)
+    found = await asyncio.gather(search_radarr(query_text), search_sonarr(query_text), return_exceptions=True)
+    results: list[SearchResult] = []
+    for service_results in found:
+        if isinstance(service_results, list):
+            results.extend(service_results)
+        elif isinstance(service_results, Exception) and not isinstance(service_results, UpstreamBusy):
+            logger.warning(f"Inline search for '{query_text}' failed: {service_results}")
+    await _answer_inline_query(update, query_text, results)
+
+
+@restricted
+async def inline_query_received(update: Update, context: CallbackContext) -> None:
+    """Handles '@bot title' type-ahead: answers from the cache at once, otherwise schedules a debounced lookup."""
+    query = update.inline_query
+    if not query:
+        return
+    user_id = query.from_user.id
+    previous = _inline_tasks.pop(user_id, None)
+    if previous:
+        previous.cancel()
+
+    query_text = query.query.strip()
+    if len(SearchCache.normalize(query_text)) < INLINE_MIN_QUERY_LENGTH:
+        await query.answer([], cache_time=0)
+        return
+
+    cached = _cached_inline_results(query_text)
+    if cached is not None:
+        await _answer_inline_query(update, query_text, cached)
+        return
+
+    # Run in the background so the debounce never holds up other updates
+    task = context.application.create_task(_search_inline_after_debounce(update, query_text), update=update)
+    _inline_tasks[user_id] = task
+    task.add_done_callback(lambda done: _inline_tasks.pop(user_id, None) if _inline_tasks.get(user_id) is done else None)
+
+
+@restricted
+async def inline_add_chosen(update: Update, context: CallbackContext) -> None:
+    """Handles the Add button on a message posted from an inline result, outside the search conversation."""
+    query = update.callback_query
+    if not query or not query.data:
+        return
+    item = _inline_items.get(query.data.removeprefix('iadd:'))
+    if item is None:
+        await query.answer("This result has expired. Please search again.", show_alert=True)
+        return
+
+    # A callback query is answered once, so the spinner stays up until the add finishes
+    results = await _add_to_instances(item)
+    added, result_text = _add_result_text(item, results)
+    if added:
+        await query.answer(f"Added {item.title}.")
+        if NOTIFY_PORT:
+            requester_registry.record(item.media_type, item.external_id, query.from_user.id)
+    elif all(add_result in _EXISTS_CODES for _, add_result in results):
+        await query.answer()
+    else:
+        # Nothing changed, so the message keeps its Add button for another try
+        failed = ', '.join(instance.name for instance, add_result in results if add_result not in _EXISTS_CODES)
+        await query.answer(f"❌ Could not add {item.title} to {failed}. Please try again later.", show_alert=True)
+        return
+    try:
+        await query.edit_message_text(result_text, parse_mode='HTML', reply_markup=None)
+    except BadRequest as e:
+        logger.warning(f"Could not update inline add message: {e}")
+
+
 @restricted
 async def cancel_conversation(update: Update, context: CallbackContext) -> int:
     """Cancels the current conversation."""
@@ -531,6 +1347,16 @@ async def cancel_conversation_and_restart(update: Update, context: CallbackConte
 
 async def global_error_handler(update: object, context: CallbackContext) -> None:
     """Global error handler that logs exceptions and notifies users gracefully."""
+    if isinstance(context.error, UpstreamBusy):
+        # Saturation is expected under load: answer fast and leave the conversation where it was
+        logger.warning(f"Rejected update because {context.error.upstream} is busy.")
+        if isinstance(update, Update) and update.effective_chat:
+            try:
+                await context.bot.send_message(chat_id=update.effective_chat.id, text=_busy_text(context.error))
+            except Exception as e:
+                logger.warning(f"Failed to send busy notification message: {e}")
+        return
+
     logger.error(msg="Exception while handling an update:", exc_info=context.error)
 
     if isinstance(update, Update) and update.effective_chat:
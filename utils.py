@@ -1,17 +1,25 @@
+import asyncio
 import logging
-import requests
+import time
+import httpx
 import json
+from urllib.parse import urlsplit
 from functools import wraps
+from typing import Collection
 from telegram import Update
 from telegram.ext import CallbackContext, ConversationHandler
 
-from config import ALLOWED_USER_IDS, DEFAULT_TIMEOUT
+from config import ALLOWED_USER_IDS, ADMIN_USER_IDS, DEFAULT_TIMEOUT, CONNECT_TIMEOUT
+from http_client import get_client
+from concurrency import UpstreamBusy, get_limiter
+from circuit_breaker import CircuitOpen, get_breaker
+from retry_policy import RetryBudget, RETRY_STATUSES, IDEMPOTENT_METHODS
+from metrics import record_handler, record_upstream
+from profiler import handler_profiler
+from json_decode import decode_array, loads
 
 logger = logging.getLogger(__name__)
 
-# Shared HTTP Session with Connection Pooling
-http_session = requests.Session()
-
 
 def is_user_allowed(user_id: int) -> bool:
     """Checks if the user is allowed to use the bot based on configured allowed IDs."""
@@ -20,6 +28,25 @@ def is_user_allowed(user_id: int) -> bool:
     return user_id in ALLOWED_USER_IDS
 
 
+def is_user_admin(user_id: int) -> bool:
+    """Checks if the user is an allowed user listed in ADMIN_USER_IDS."""
+    return user_id in ADMIN_USER_IDS and is_user_allowed(user_id)
+
+
+def admin_only(func):
+    """Decorator, applied under @restricted, that limits a handler to ADMIN_USER_IDS."""
+    @wraps(func)
+    async def wrapped(update: Update, context: CallbackContext, *args, **kwargs):
+        user = update.effective_user
+        if not user or not is_user_admin(user.id):
+            logger.warning(f"Non-admin user {user.id if user else 'Unknown'} tried to use {func.__name__}")
+            if update.effective_message:
+                await update.effective_message.reply_text("⛔ This command is for admins only.")
+            return None
+        return await func(update, context, *args, **kwargs)
+    return wrapped
+
+
 def restricted(func):
     """Decorator to restrict handler execution to authorized Telegram users only."""
     @wraps(func)
@@ -31,22 +58,126 @@ def restricted(func):
                 await update.effective_message.reply_text("⛔ Sorry, you are not authorized to use this bot.")
             elif update.callback_query:
                 await update.callback_query.answer("⛔ Unauthorized.", show_alert=True)
+            elif update.inline_query:
+                await update.inline_query.answer([], cache_time=0)
             return ConversationHandler.END
-        return await func(update, context, *args, **kwargs)
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await handler_profiler.run(func.__name__, func, update, context, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            record_handler(func.__name__, time.perf_counter() - started, failed)
     return wrapped
 
 
-def make_api_request(base_url: str, api_key: str, endpoint: str, params: dict | None = None) -> list | dict | None:
-    """Makes a generic API GET request using the shared session."""
+async def _send_once(upstream: str, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+    """Makes a single attempt through the upstream's circuit breaker, concurrency limit and pooled client."""
+    breaker = get_breaker(upstream)
+    try:
+        # The slot comes first: a half-open trial admitted and then refused a slot would never report back
+        async with get_limiter(upstream).slot():
+            breaker.before_call()
+            started = time.perf_counter()
+            try:
+                response = await get_client(upstream).request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                record_upstream(upstream, endpoint, type(e).__name__, time.perf_counter() - started)
+                raise
+            except BaseException:
+                # Cancelled (e.g. a superseded inline search) or failed without an answer from the upstream
+                breaker.abandon_trial()
+                raise
+    except CircuitOpen:
+        record_upstream(upstream, endpoint, 'circuit_open', None)
+        raise
+    except UpstreamBusy:
+        record_upstream(upstream, endpoint, 'busy', None)
+        raise
+    record_upstream(upstream, endpoint, str(response.status_code), time.perf_counter() - started)
+    # Any answer below 500 proves the upstream is up, even a validation error
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+
+async def send_request(
+    upstream: str, method: str, url: str, retry: bool | None = None, endpoint: str | None = None, **kwargs
+) -> httpx.Response:
+    """Sends a request through the upstream's pooled client.
+
+    endpoint names the call in metrics (e.g. 'movie/lookup', 'add'); it defaults to the URL path.
+
+    Idempotent requests (GET) are retried on connection errors, timeouts and 502/503/504 with jittered
+    backoff within RETRY_DEADLINE; pass retry=False to opt out. Anything else, such as the add POSTs,
+    is sent exactly once.
+    Raises httpx.HTTPError on failure, UpstreamBusy if the upstream is saturated,
+    or CircuitOpen without contacting it while its circuit is open.
+    """
+    if retry is None:
+        retry = method.upper() in IDEMPOTENT_METHODS
+    if endpoint is None:
+        endpoint = urlsplit(url).path
+    if not retry:
+        response = await _send_once(upstream, endpoint, method, url, **kwargs)
+        response.raise_for_status()
+        return response
+
+    budget = RetryBudget()
+    while True:
+        attempt = budget.start_attempt()
+        # Keep every attempt inside the overall deadline
+        if budget.remaining < DEFAULT_TIMEOUT:
+            kwargs['timeout'] = httpx.Timeout(budget.remaining, connect=min(CONNECT_TIMEOUT, budget.remaining))
+        try:
+            response = await _send_once(upstream, endpoint, method, url, **kwargs)
+            if response.status_code not in RETRY_STATUSES:
+                break
+            failure = f"HTTP {response.status_code}"
+            delay = budget.next_delay()
+            if delay is None:
+                break
+        except httpx.TransportError as e:
+            failure = f"{type(e).__name__}: {e}"
+            delay = budget.next_delay()
+            if delay is None:
+                raise
+        logger.warning(
+            f"Transient {upstream} failure on {method} {url} ({failure}). "
+            f"Retrying in {delay:.2f}s (attempt {attempt + 1}/{budget.max_attempts})."
+        )
+        await asyncio.sleep(delay)
+
+    response.raise_for_status()
+    return response
+
+
+async def make_api_request(
+    upstream: str, base_url: str, api_key: str, endpoint: str, params: dict | None = None,
+    limit: int | None = None, fields: Collection[str] | None = None,
+) -> list | dict | None:
+    """Makes a generic API GET request using the upstream's pooled client.
+
+    For list responses, limit keeps only the first elements and fields projects each element down to those
+    keys, so the rest of a large response is never built into Python objects.
+    """
     headers = {'X-Api-Key': api_key}
     url = f"{base_url}/api/v3/{endpoint}"
     logger.info(f"Attempting API request to: {url} with params: {params}")
     try:
-        response = http_session.get(url, headers=headers, params=params, timeout=DEFAULT_TIMEOUT)
-        response.raise_for_status()
+        response = await send_request(upstream, 'GET', url, headers=headers, params=params, endpoint=endpoint)
         logger.debug(f"API request successful for {url}. Status: {response.status_code}")
-        return response.json()
-    except requests.exceptions.RequestException:
+        if limit is None and fields is None:
+            return loads(response.content)
+        return decode_array(response.content, limit, fields)
+    except CircuitOpen:
+        logger.warning(f"Skipped API request to {url}: {upstream} is unreachable (circuit open).")
+        return None
+    except httpx.HTTPError:
         logger.exception(f"API request failed for {url}.")
         return None
     except json.JSONDecodeError: